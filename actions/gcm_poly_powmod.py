@@ -1,4 +1,4 @@
-from lib.polynomial import Poly
+from lib.polynomial import Poly, PolyModulus
 
 import base64
 
@@ -8,7 +8,7 @@ def load(json_object):
     assert "exponent" in json_object, "Missing JSON value 'exponent'"
 
     base = [base64.b64decode(i) for i in json_object["base"]]; base = Poly(base)
-    modulo = [base64.b64decode(i) for i in json_object["modulo"]]; modulo = Poly(modulo)
+    modulo = [base64.b64decode(i) for i in json_object["modulo"]]; modulo = PolyModulus(Poly(modulo))
     exponent = json_object["exponent"]
 
     a_pow_b = base.square_and_multiply(exponent, modulo)
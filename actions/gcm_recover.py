@@ -1,48 +1,28 @@
-from lib.finite_field import FFPoly
+from lib.finite_field import FFPoly, blocks_to_polys
 from lib.polynomial import Poly
-from lib.cantor_zassenhaus import cantor_zassenhaus
+from lib.cantor_zassenhaus import split_factors_parallel, DEFAULT_WORKERS
+from lib.roots import linear_factor_product
+from lib.factor import factor
 from lib.aes_gcm import GHASH, pad
 
 import base64
 
 MAX_CZ_TRIES = 15
 
-def factorize(equation):
-    # Calculate expected number of factors
-    d = equation.degree
-
-    # Factorize polynomial
-    factors = [equation]
+def factorize(equation, workers=DEFAULT_WORKERS):
+    # Split the product of linear factors, every part is reduced modulo itself
+    # With more than one worker the parts are split in worker processes
+    linear, stuck = split_factors_parallel(equation, workers, MAX_CZ_TRIES)
 
     # Avoid duplicate factors
-    def insert(factor):
-        if any([factor == f for f in factors]): return
-        factors.append(factor)
-
-    while True:
-        next_factor = None
-        for key, f in enumerate(factors):
-            if f.degree != 1:
-                next_factor = factors.pop(key)
-                break
-
-        # If no factor > 1 was found, we are done
-        if next_factor is None:
-            break
-
-        # Repeat until we have two factors
-        k1, k2, ctr = None, None, 0
-        while (k1 is None or k2 is None) and ctr < MAX_CZ_TRIES:
-            k1, k2 = cantor_zassenhaus(equation, next_factor)
-            ctr += 1
-        if ctr == MAX_CZ_TRIES:
-            continue
-        assert k1*k2 == next_factor, "Factorization failed (k1*k2 != p)"
-
-        insert(k1)
-        insert(k2)
-
-    return factors
+    factors = set(linear)
+    for p in stuck:
+        # Cantor-Zassenhaus gave up, the full factorisation always splits
+        for f, _ in factor(p):
+            assert f.degree == 1, "The equation must be a product of linear factors"
+            factors.add(f)
+
+    return list(factors)
 
 def load(json_object):
     assert "nonce" in json_object, "Missing JSON value 'nonce'"
@@ -66,6 +46,11 @@ def load(json_object):
     assert "ciphertext" in json_object["msg4"], "Missing JSON value 'ciphertext' in 'msg4'"
     assert "associated_data" in json_object["msg4"], "Missing JSON value 'associated_data' in 'msg4'"
 
+    # Optional number of worker processes for the factorisation, the
+    # default comes from the environment variable FACTOR_WORKERS
+    workers = json_object.get("workers", DEFAULT_WORKERS)
+    assert isinstance(workers, int) and workers >= 1, "JSON value 'workers' must be a positive integer"
+
     nonce = base64.b64decode(json_object["nonce"])
 
     c1 = base64.b64decode(json_object["msg1"]["ciphertext"])
@@ -84,14 +69,12 @@ def load(json_object):
     a_data4 = base64.b64decode(json_object["msg4"]["associated_data"])
 
     # Split ciphertexts into n blocks (Reversed)
-    U = [FFPoly(pad(c1[i:i+16])) for i in range(0, len(c1), 16)];U = U[::-1]
-    V = [FFPoly(pad(c2[i:i+16])) for i in range(0, len(c2), 16)];V = V[::-1]
-    W = [FFPoly(pad(c3[i:i+16])) for i in range(0, len(c3), 16)];W = W[::-1]
+    U = [FFPoly(i) for i in blocks_to_polys(pad(c1, True))];U = U[::-1]
+    V = [FFPoly(i) for i in blocks_to_polys(pad(c2, True))];V = V[::-1]
 
     # Split associated data into n blocks (Reversed)
-    A = [FFPoly(pad(a_data1[i:i+16])) for i in range(0, len(a_data1), 16)];A = A[::-1]
-    B = [FFPoly(pad(a_data2[i:i+16])) for i in range(0, len(a_data2), 16)];B = B[::-1]
-    C = [FFPoly(pad(a_data3[i:i+16])) for i in range(0, len(a_data3), 16)];C = C[::-1]
+    A = [FFPoly(i) for i in blocks_to_polys(pad(a_data1, True))];A = A[::-1]
+    B = [FFPoly(i) for i in blocks_to_polys(pad(a_data2, True))];B = B[::-1]
 
     # Create auth tag polynomials
     TU = FFPoly(auth_tag_1)
@@ -136,10 +119,6 @@ def load(json_object):
     coefficients_2 = []
     for i in range(len(V)): coefficients_2.append(V[i])
     for i in range(len(B)): coefficients_2.append(B[i])
-    # For later use in step 7
-    coefficients_3 = []
-    for i in range(len(W)): coefficients_3.append(W[i])
-    for i in range(len(C)): coefficients_3.append(C[i])
 
     # Step 4: Add all coefficients to the equation
     #         If #1 = #2 we always add c1[i] - c2[i]
@@ -163,54 +142,26 @@ def load(json_object):
     # Step 6: Factorize the polynomial to find the zero points
     # (H + Q1)(H + Q2)(H + Q3)(H + Q4) = - B1 H^4 + (A1 - v1) H^3 + (u1 - v2) H^2 + (TV - TU) H^0 = 0
     # Now one of the factors is H
-    factors = factorize(poly)
+    # Only the linear factors are needed, so split only their product
+    # gcd(poly, X^(2^128) - X) and leave the other factors alone
+    roots = linear_factor_product(poly)
+    assert roots.degree >= 1, "The equation has no roots"
+    factors = factorize(roots, workers)
 
     # Step 7: Find the correct H candidate
-    H = None
-    EKY0 = None
-    for f in factors:
-        h_candidate = f[0]
-
-        # Build equation system for message 1 and 2
-        # TU = A1 H^4 + U1 H^3 + U2 H^2 + LH + EK(y0)
-        # - EK(y0) = A1 H^4 + U1 H^3 + U2 H^2 + LH - TU
-        # EK(y0) = -A1 H^4 - U1 H^3 - U2 H^2 - LH + TU
-        # Later check if TU matches the auth tag
-
-        equation1 = []
-        equation1.append(TU)
-        ghash1 = GHASH(h_candidate.block, a_data1, c1)
-        equation1.append(-FFPoly(ghash1.L))
-        for c in coefficients_1:
-            equation1.append(-c)
-
-        # Convert equation1 to polynomial
-        poly1 = Poly(equation1)
-
-        # Solve the equation1 and compare the result with the auth tag
-        y0_1 = poly1.solve([h_candidate] * len(poly1))
-
-
-        # Now we have the encrypted y0 and insert it into the equation
-        # TW = W1 H^4 + W2 H^3 + W3 H^2 + LH + EK(y0)
-        equation2 = []
-        equation2.append(y0_1)
-        ghash2 = GHASH(h_candidate.block, a_data3, c3)
-        equation2.append(FFPoly(ghash2.L))
-        for c in coefficients_3:
-            equation2.append(c)
-
-        # Convert equation2 to polynomial
-        poly2 = Poly(equation2)
-
-        # Solve the equation2 and compare the result with the auth tag
-        tw_cantidate = poly2.solve([h_candidate] * len(poly2))
-
-        # Check if the auth tag matches
-        if tw_cantidate == TW:
-            H = h_candidate
-            EKY0 = y0_1
-            break
+    # TU = A1 H^4 + U1 H^3 + U2 H^2 + LH + EK(y0) is GHASH as a polynomial in H
+    # plus EK(y0), the same holds for TW and message 3:
+    #   TU - GHASH1(H) = EK(y0) = TW - GHASH3(H)
+    # So the correct H is a zero of GHASH1 + GHASH3 + TU + TW. It is
+    # evaluated at all candidates at once.
+    candidates = [f[0] for f in factors]
+    check = GHASH(b"", a_data1, c1).poly + GHASH(b"", a_data3, c3).poly + Poly([TU + TW])
+    values = check.evaluate_many(candidates)
+    H = next((h for h, value in zip(candidates, values) if value == 0), None)
+    assert H is not None, "No H candidate matches the auth tag of message 3"
+
+    # Now we have the encrypted y0
+    EKY0 = TU - FFPoly(GHASH(H.block, a_data1, c1).digest())
 
     # Step 8: Calculate the auth tag for message 4
     #       auth_tag = GHASH XOR EK(y0)
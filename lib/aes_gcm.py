@@ -1,6 +1,7 @@
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.backends import default_backend
-from lib.finite_field import FFPoly
+from lib.finite_field import FFPoly, FFMultiplier, blocks_to_polys, poly_to_block
+from lib.polynomial import Poly
 
 import base64
 
@@ -22,11 +23,10 @@ class GHASH:
         associated_data = pad(associated_data)
         ciphertext = pad(ciphertext, True)
 
-        # prepare ciphertext blocks and split into 16 byte blocks
-        self._C = [ciphertext[i:i+16] for i in range(0, len(ciphertext), 16)]
-
-        # prepare associated data blocks and split into 16 byte blocks
-        self._A = [associated_data[i:i+16] for i in range(0, len(associated_data), 16)]
+        # prepare padded ciphertext and associated data
+        # both are converted to polynomials in bulk when hashing
+        self._C = ciphertext
+        self._A = associated_data
 
         self._H = auth_key
         self._L = (associated_data_length).to_bytes(8, "big") + (ciphertext_length).to_bytes(8, "big")
@@ -35,23 +35,30 @@ class GHASH:
     def L(self) -> bytes:
         return self._L
 
+    @property
+    def blocks(self) -> list:
+        # all hashed blocks as polynomials in order:
+        # associated data blocks, ciphertext blocks and the length block
+        return blocks_to_polys(self._A + self._C + self._L)
+
+    @property
+    def poly(self) -> Poly:
+        # GHASH as a polynomial in H, the first block has the highest degree
+        #   b_1 H^n + b_2 H^(n-1) + ... + b_n H
+        return Poly.from_raw([0] + self.blocks[::-1])
+
     def digest(self) -> bytes:
-        h = FFPoly(self._H)
+        # H is the same for every block, so precompute its multiplication tables
+        h = FFMultiplier(FFPoly(self._H))
 
         # initialize hash with zero block
-        out_hash = FFPoly(b"\x00" * 16)
-
-        # iterate over associated data blocks
-        for a in self._A:
-            out_hash = (out_hash ^ FFPoly(a)) * h
+        out_hash = 0
 
-        # iterate over ciphertext blocks
-        for c in self._C:
-            out_hash = (out_hash ^ FFPoly(c)) * h
+        # iterate over associated data, ciphertext and length blocks
+        for block in self.blocks:
+            out_hash = h.mul_int(out_hash ^ block)
 
-        # add length block
-        out_hash = (out_hash ^ FFPoly(self._L)) * h
-        return out_hash.block
+        return poly_to_block(out_hash)
 
 class AES_GCM:
     def __init__(self, key: bytes, nonce: bytes):
@@ -93,28 +100,14 @@ class AES_GCM:
         # Generate auth key H
         H = self._aes.update(b"\x00" * 16)
 
-        # Prepare all plaintext blocks and split into 16 byte blocks
-        plaintext_blocks = [plaintext[i:i+16] for i in range(0, len(plaintext), 16)]
-
-        self._ciphertext = bytearray()
-        for i, p in enumerate(plaintext_blocks):
-            # Prepare next encrypted block
-            next_block = self.__next_block
-            # next_block must be of the same length as the plaintext block
-            next_block = next_block[:len(p)]
-
-            c_block = FFPoly(next_block)
-            p_block = FFPoly(p)
-
-            ciphertext = (c_block ^ p_block).block
-
-            if len(p) != 16: ciphertext = ciphertext.lstrip(b'\x00')
-
-            # append to ciphertext
-            self._ciphertext += ciphertext
+        # Prepare the key stream for all plaintext blocks
+        key_stream = b"".join([self.__next_block for _ in range(0, len(plaintext), 16)])
+        # key stream must be of the same length as the plaintext
+        key_stream = key_stream[:len(plaintext)]
 
-        # convert ciphertext to bytes
-        self._ciphertext = bytes(self._ciphertext)
+        # XOR the whole plaintext at once, this needs no block conversion
+        ciphertext = int.from_bytes(plaintext, "big") ^ int.from_bytes(key_stream, "big")
+        self._ciphertext = ciphertext.to_bytes(len(plaintext), "big")
 
         # Generate GHASH
         ghash = GHASH(H, self._associated_data, self._ciphertext)
@@ -1,14 +1,32 @@
 from lib.finite_field import FFPoly
-from lib.polynomial import Poly, rand_poly
+from lib.polynomial import Poly, PolyModulus, rand_poly
+
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from functools import lru_cache
+import multiprocessing, os, random
 
 # Cantor-Zassenhaus algorithm for factoring polynomials over finite fields
-def cantor_zassenhaus(f: Poly, p: Poly) -> tuple:
+# Every factor is split modulo itself: the random polynomial has the degree
+# of the factor and the exponentiation is reduced by the factor only, so
+# the small factors at the leaves of the splitting tree are cheap
+
+Q = 2 ** 128
+
+def _workers_from_env() -> int:
+    value = os.environ.get("FACTOR_WORKERS", "1").strip()
+    assert value.isdigit() and int(value) >= 1, f"Environment variable FACTOR_WORKERS must be a positive integer, got '{value}'"
+    return int(value)
 
-    q = 2 ** 128
-    d = len(f) - 1
-    h = rand_poly(d - 1)
+# Worker processes of split_factors_parallel, 1 splits in this process
+DEFAULT_WORKERS = _workers_from_env()
 
-    g = h.square_and_multiply(((q-1)//3), f)
+# One random split attempt of p, a product of distinct linear factors
+# modulus is an optional PolyModulus for p, it can be shared between attempts
+def cantor_zassenhaus(p: Poly, modulus: PolyModulus = None) -> tuple:
+    if modulus is None: modulus = PolyModulus(p)
+
+    h = rand_poly(p.degree - 1)
+    g = h.square_and_multiply((Q - 1) // 3, modulus)
 
     # Subtract 1
     g[0] = g[0] - FFPoly(1)
@@ -21,3 +39,98 @@ def cantor_zassenhaus(f: Poly, p: Poly) -> tuple:
         return k1, k2
     else:
         return None, None
+
+# Splitting tree: p is split, then every part modulo itself until all parts
+# are linear. Returns the linear factors and the parts that could not be
+# split within max_tries attempts each (no limit for None)
+def split_factors(p: Poly, max_tries: int = None) -> tuple:
+    linear, stuck = [], []
+    parts = [p]
+    while parts:
+        part = parts.pop()
+        if part.degree <= 1:
+            if part.degree == 1: linear.append(part)
+            continue
+
+        modulus = PolyModulus(part)
+        k1, k2, ctr = None, None, 0
+        while k1 is None and (max_tries is None or ctr < max_tries):
+            k1, k2 = cantor_zassenhaus(part, modulus)
+            ctr += 1
+        if k1 is None:
+            stuck.append(part)
+            continue
+        assert k1 * k2 == part, "Factorization failed (k1*k2 != p)"
+
+        parts += [k1, k2]
+    return linear, stuck
+
+@lru_cache(maxsize=16)
+def _worker_modulus(p: Poly) -> PolyModulus:
+    # Later attempts on the same part in a worker reuse the Frobenius tables
+    return PolyModulus(p)
+
+def _split_attempt(p: Poly) -> tuple:
+    return cantor_zassenhaus(p, _worker_modulus(p))
+
+# Like split_factors, but the attempts run in a pool of worker processes.
+# The parts of the tree are independent and split concurrently, every part
+# races several random attempts: the first success wins, the other attempts
+# are cancelled (or ignored if they already run)
+def split_factors_parallel(p: Poly, workers: int = None, max_tries: int = None) -> tuple:
+    if workers is None: workers = DEFAULT_WORKERS
+    assert workers >= 1, "At least one worker is required"
+    if workers == 1: return split_factors(p, max_tries)
+
+    linear, stuck = [], []
+    # Pending attempt -> [part, submitted attempts, pending attempts of the part]
+    owner = {}
+
+    # fork: the workers inherit the loaded modules, but also the random
+    # state, so it is reseeded. Without fork (Windows) the workers are
+    # spawned and import lib.* again
+    method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+    context = multiprocessing.get_context(method)
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=random.seed) as executor:
+        def race(state, n):
+            for _ in range(n):
+                if max_tries is not None and state[1] >= max_tries: break
+                future = executor.submit(_split_attempt, state[0])
+                state[1] += 1
+                state[2].add(future)
+                owner[future] = state
+
+        def start(part, n):
+            if part.degree <= 1:
+                if part.degree == 1: linear.append(part)
+                return
+            race([part, 0, set()], n)
+
+        start(p, workers)
+        while owner:
+            done, _ = wait(owner, return_when=FIRST_COMPLETED)
+            for future in done:
+                # Attempts of an already split part are ignored
+                state = owner.pop(future, None)
+                if state is None: continue
+                part, _, pending = state
+                pending.discard(future)
+
+                k1, k2 = future.result()
+                if k1 is None:
+                    # Keep the width of the race
+                    race(state, 1)
+                    if not pending: stuck.append(part)
+                    continue
+                assert k1 * k2 == part, "Factorization failed (k1*k2 != p)"
+
+                for other in pending:
+                    other.cancel()
+                    owner.pop(other)
+                pending.clear()
+
+                # Share the idle workers between both parts
+                n = max(1, (workers - len(owner)) // 2)
+                start(k1, n)
+                start(k2, n)
+    return linear, stuck
@@ -0,0 +1,107 @@
+from lib.finite_field import FFPoly
+from lib.polynomial import Poly, PolyModulus, rand_poly
+
+# Factorisation of polynomials over GF(2^128) in three stages:
+#   1. square-free factorisation: f = product of g_i^i with g_i square-free
+#   2. distinct-degree factorisation: g = product of h_d, where h_d is the
+#      product of all irreducible factors of degree d
+#   3. equal-degree splitting of every h_d with the trace map
+
+# Exponent of the field size q = 2^128
+Q_BITS = 128
+
+def derivative(f: Poly) -> Poly:
+    # i * a_i is a_i for odd i and zero for even i in characteristic 2
+    return Poly([f[i] if i % 2 == 1 else FFPoly(0) for i in range(1, len(f))])
+
+def sqrt(f: Poly) -> Poly:
+    # f has only even exponents (f' = 0), so f = (sum sqrt(a_2i) X^i)^2
+    # and sqrt(a) = a^(2^127) in GF(2^128)
+    return Poly([f[i].frobenius(Q_BITS - 1) for i in range(0, len(f), 2)])
+
+def square_free_factorization(f: Poly) -> list:
+    # Returns [(g, multiplicity), ...] with square-free, pairwise coprime g
+    # (Yun's algorithm with the extra p-th root step of characteristic p)
+    res = []
+    c = f.gcd(derivative(f))
+    w = f / c
+    i = 1
+    while w.degree > 0:
+        y = w.gcd(c)
+        factor = w / y
+        if factor.degree > 0: res.append((factor, i))
+        w, c = y, c / y
+        i += 1
+
+    # What is left in c has only even exponents
+    if c.degree > 0:
+        res += [(g, 2 * multiplicity) for g, multiplicity in square_free_factorization(sqrt(c))]
+    return res
+
+def distinct_degree_factorization(f: Poly) -> list:
+    # f monic and square-free, returns [(h_d, d), ...]
+    # X^(q^d) - X is the product of all monic irreducibles with degree dividing d
+    res = []
+    x = Poly([0, 1])
+    h = x
+    d = 1
+    modulus = PolyModulus(f)
+    while f.degree >= 2 * d:
+        # h = X^(q^d) mod f, the q-power map is GF(q)-linear and uses the
+        # cached images of X^i
+        h = modulus.frobenius(h, Q_BITS)
+
+        g = f.gcd(h - x)
+        if g.degree > 0:
+            res.append((g, d))
+            f = f / g
+            modulus = PolyModulus(f)
+        d += 1
+
+    if f.degree > 0:
+        res.append((f, f.degree))
+    return res
+
+def trace(a: Poly, modulus: PolyModulus, d: int) -> Poly:
+    # Absolute trace of GF(q^d) over GF(2) in every residue field of f:
+    #   Tr(a) = a + a^2 + a^4 + ... + a^(2^(Q_BITS d - 1))
+    # computed in two steps, first the trace over GF(q)
+    #   t = a + a^q + ... + a^(q^(d-1))
+    # and then t + t^2 + ... + t^(2^(Q_BITS - 1)). The result is 0 or 1
+    # in every residue field.
+    t = s = modulus.reduce(a)
+    for _ in range(d - 1):
+        s = modulus.frobenius(s, Q_BITS)
+        t = t + s
+
+    res = s = t
+    for _ in range(Q_BITS - 1):
+        s = modulus.square(s)
+        res = res + s
+    return res
+
+def equal_degree_factorization(f: Poly, d: int) -> list:
+    # f monic and square-free with all irreducible factors of degree d
+    # For a random a, Tr(a) is 0 or 1 with probability 1/2 independently
+    # in every factor, so gcd(f, Tr(a)) splits off about half of them
+    if f.degree <= d:
+        return [f]
+
+    modulus = PolyModulus(f)
+    while True:
+        g = f.gcd(trace(rand_poly(f.degree - 1), modulus, d))
+        if 0 < g.degree < f.degree:
+            return equal_degree_factorization(g, d) + equal_degree_factorization(f / g, d)
+
+def factor(f: Poly) -> list:
+    # Monic irreducible factors of f with multiplicities [(p, e), ...],
+    # sorted by degree, the leading coefficient is ignored
+    assert not f.is_zero, "Cannot factor the zero polynomial"
+    f = f / f[-1]
+
+    res = []
+    for g, multiplicity in square_free_factorization(f):
+        for h, d in distinct_degree_factorization(g):
+            res += [(p, multiplicity) for p in equal_degree_factorization(h, d)]
+
+    return sorted(res, key=lambda factor: (factor[0].degree, factor[0].raw[::-1]))
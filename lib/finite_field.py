@@ -1,28 +1,38 @@
-import random
+import random, os, time
+
+# x^128 + x^7 + x^2 + x + 1
+FIELD = (1<<128)|(1<<7)|(1<<2)|(1<<1)|(1<<0)
+MASK_128 = (1<<128) - 1
+MASK_64 = (1<<64) - 1
+
+# GCM stores the coefficient of x^0 in the most significant bit of the
+# first byte. Reversing the bits of every byte and reading the block as
+# little endian integer reflects all 128 bits at once.
+_REVERSE_BITS = bytes(int(format(i, "08b")[::-1], 2) for i in range(256))
 
 def block_to_poly(block: bytes) -> int:
-    # convert to int
-    block = int.from_bytes(block, "big")
-    # reverse bits
-    return int(format(block, '0128b')[::-1], 2)
+    # shorter blocks are interpreted as right-aligned 128 bit numbers
+    if len(block) < 16: block = block.rjust(16, b"\x00")
+    return int.from_bytes(block.translate(_REVERSE_BITS), "little")
 
-def block_to_exponents(block: bytes) -> list:
-    poly = block_to_poly(block)
+def poly_to_exponents(poly: int) -> list:
+    return [i for i, bit in enumerate(reversed(format(poly, "b"))) if bit == "1"]
 
-    exponents = []
-    for i in range(poly.bit_length()):
-        if poly & (1<<i):
-            exponents.append(i)
-    return exponents
+def block_to_exponents(block: bytes) -> list:
+    return poly_to_exponents(block_to_poly(block))
 
 def poly_to_block(poly: int) -> bytes:
-    bin_poly = ""
-    for i in range(128):
-        if poly & (1<<i):
-            bin_poly += "1"
-        else:
-            bin_poly += "0"
-    return int(bin_poly, 2).to_bytes(16, "big")
+    return (poly & MASK_128).to_bytes(16, "little").translate(_REVERSE_BITS)
+
+def blocks_to_polys(data: bytes) -> list:
+    # Bulk variant of block_to_poly for a buffer of N 16 byte blocks
+    assert len(data) % 16 == 0, "Data must be a multiple of 16 bytes"
+    reflected = data.translate(_REVERSE_BITS)
+    return [int.from_bytes(reflected[i:i+16], "little") for i in range(0, len(reflected), 16)]
+
+def polys_to_blocks(polys: list) -> bytes:
+    # Bulk variant of poly_to_block, returns all blocks concatenated
+    return b"".join([(p & MASK_128).to_bytes(16, "little") for p in polys]).translate(_REVERSE_BITS)
 
 def exponents_to_poly(exponents: list) -> int:
     poly = 0
@@ -50,39 +60,261 @@ def str_to_poly(string: str):
     str = str.replace("Y", "")
     return exponents_to_poly([int(i) for i in str.split("+")])
 
+def ff_reduce(poly: int) -> int:
+    # Fold everything above x^127 back into the field using
+    # x^128 = x^7 + x^2 + x + 1. Each fold shrinks the polynomial
+    # by 121 bits, so a full 255 bit product needs at most two folds.
+    while poly >> 128:
+        high = poly >> 128
+        poly = (poly & MASK_128) ^ high ^ (high << 1) ^ (high << 2) ^ (high << 7)
+    return poly
+
+def clmul_loop(a: int, b: int) -> int:
+    # Carry-less multiplication without modular reduction
+    # Reference implementation: one shift-and-add step per bit of b
+    res = 0
+    while b:
+        if b & 1: res ^= a
+        b >>= 1
+        a <<= 1
+    return res
+
+def clmul_karatsuba(a: int, b: int) -> int:
+    # Carry-less multiplication without modular reduction
+    # Splits both operands into 64 bit halves and needs only three
+    # half-size products: a0*b0, a1*b1 and (a0+a1)*(b0+b1)
+    a0 = a & MASK_64; a1 = a >> 64
+    b0 = b & MASK_64; b1 = b >> 64
+
+    products = []
+    for x, y in ((a0, b0), (a1, b1), (a0 ^ a1, b0 ^ b1)):
+        # Half-size product with a 4 bit window: precompute x * n for
+        # n = 0..15 and consume y one nibble at a time
+        table = [0] * 16
+        table[1] = x; table[2] = x << 1; table[3] = table[2] ^ x
+        table[4] = x << 2; table[5] = table[4] ^ x; table[6] = table[4] ^ table[2]; table[7] = table[6] ^ x
+        x8 = x << 3
+        for i in range(8): table[8 + i] = x8 ^ table[i]
+
+        res, shift = 0, 0
+        while y:
+            res ^= table[y & 15] << shift
+            y >>= 4
+            shift += 4
+        products.append(res)
+
+    lo, hi, mid = products
+    return lo ^ ((mid ^ lo ^ hi) << 64) ^ (hi << 128)
+
+# Translation tables for the "holes" trick
+# '0'/'1' -> 0x00/0x01 (spread one bit per byte) and byte -> '0'/'1' (parity)
+_HOLES_SPREAD = bytes.maketrans(b"01", b"\x00\x01")
+_HOLES_PARITY = bytes(ord("0") + (i & 1) for i in range(256))
+
+def clmul_holes(a: int, b: int) -> int:
+    # Carry-less multiplication without modular reduction
+    # Every bit of both operands gets its own byte, so there are 7 zero bits
+    # ("holes") between two bits. A regular integer multiplication then sums
+    # at most 128 ones per byte which can never carry into the next byte.
+    # The lowest bit of every byte is the GF(2) coefficient of the product.
+    # All steps run in C (int multiply, bytes.translate, int parsing).
+    if a == 0 or b == 0: return 0
+    spread_a = int.from_bytes(format(a, "b").encode().translate(_HOLES_SPREAD), "big")
+    spread_b = int.from_bytes(format(b, "b").encode().translate(_HOLES_SPREAD), "big")
+    res = spread_a * spread_b
+    return int(res.to_bytes((res.bit_length() + 7) // 8, "big").translate(_HOLES_PARITY), 2)
+
+CLMUL_BACKENDS = {
+    "loop": clmul_loop,
+    "karatsuba": clmul_karatsuba,
+    "holes": clmul_holes,
+}
+
+def set_clmul_backend(name: str, cross_check: bool=False) -> None:
+    # Select the carry-less multiplication used by FFPoly
+    # With cross_check every product is verified against the reference loop
+    assert name in CLMUL_BACKENDS, f"Unknown clmul backend '{name}', avaliable backends: {', '.join(CLMUL_BACKENDS.keys())}"
+    global clmul
+    backend = CLMUL_BACKENDS[name]
+    if cross_check:
+        def clmul(a: int, b: int) -> int:
+            res = backend(a, b)
+            assert res == clmul_loop(a, b), f"clmul backend '{name}' mismatches reference for {a:#x} * {b:#x}"
+            return res
+    else:
+        clmul = backend
+
+def benchmark_clmul_backends(rounds: int=64) -> dict:
+    # Micro-benchmark: seconds each backend needs for the same random products
+    rng = random.Random(rounds)
+    operands = [(rng.getrandbits(128), rng.getrandbits(128)) for _ in range(rounds)]
+
+    timings = {}
+    for name, backend in CLMUL_BACKENDS.items():
+        start = time.perf_counter()
+        for a, b in operands: backend(a, b)
+        timings[name] = time.perf_counter() - start
+    return timings
+
+def fastest_clmul_backend(rounds: int=64) -> str:
+    timings = benchmark_clmul_backends(rounds)
+    return min(timings, key=timings.get)
+
+# The default backend is chosen by a short micro-benchmark on import
+# Can be overwritten for debugging, e.g. FFPOLY_CLMUL=loop FFPOLY_CLMUL_CHECK=1
+DEFAULT_CLMUL_BACKEND = os.environ.get("FFPOLY_CLMUL") or fastest_clmul_backend()
+set_clmul_backend(DEFAULT_CLMUL_BACKEND, os.environ.get("FFPOLY_CLMUL_CHECK", "0") == "1")
+
+def ff_inverse(a: int) -> int:
+    # Binary extended Euclidean algorithm over GF(2)[x]
+    # Invariants: u = g1 * a and v = g2 * a (mod field)
+    # Like a^(2^128 - 2) this maps zero to zero
+    if a == 0: return 0
+    u, v = a, FIELD
+    g1, g2 = 1, 0
+    while u != 1:
+        shift = u.bit_length() - v.bit_length()
+        if shift < 0:
+            u, v = v, u
+            g1, g2 = g2, g1
+            shift = -shift
+        u ^= v << shift
+        g1 ^= g2 << shift
+    return ff_reduce(g1)
+
+def ff_batch_inverse(values: list) -> list:
+    # Montgomery's trick: invert the product of all values once and recover
+    # every single inverse with the prefix products, 3 multiplications per
+    # value instead of one inversion each. Zeros are mapped to zero.
+    prefix = []
+    acc = 1
+    for v in values:
+        prefix.append(acc)
+        if v: acc = ff_reduce(clmul(acc, v))
+
+    # acc_inv is the inverse of the product of all values up to index i
+    acc_inv = ff_inverse(acc)
+    res = [0] * len(values)
+    for i in range(len(values) - 1, -1, -1):
+        if values[i] == 0: continue
+        res[i] = ff_reduce(clmul(acc_inv, prefix[i]))
+        acc_inv = ff_reduce(clmul(acc_inv, values[i]))
+    return res
+
+# Squaring in characteristic 2 is linear: every bit i moves to bit 2i
+# Each byte is spread to 16 bits (little endian) with a lookup table
+_SQUARE_TABLE = [int(format(i, "b"), 4).to_bytes(2, "little") for i in range(256)]
+
+def ff_square(a: int) -> int:
+    spread = b"".join([_SQUARE_TABLE[byte] for byte in a.to_bytes(16, "little")])
+    return ff_reduce(int.from_bytes(spread, "little"))
+
+def _byte_tables(basis: list) -> list:
+    # Tables for a GF(2)-linear map given by the images of x^0 .. x^127
+    # For every byte position i: table[n] = image of n * x^(8i)
+    tables = []
+    for i in range(0, 128, 8):
+        # Build all 256 combinations, each entry only needs one XOR
+        # with an already computed entry
+        table = [0] * 256
+        for n in range(1, 256):
+            lowest_bit = n & -n
+            table[n] = table[n ^ lowest_bit] ^ basis[i + lowest_bit.bit_length() - 1]
+        tables.append(table)
+    return tables
+
+def _apply_byte_tables(tables: list, a: int) -> int:
+    res = 0
+    for table, byte in zip(tables, a.to_bytes(16, "little")):
+        res ^= table[byte]
+    return res
+
+class FFFrobenius:
+    # Precomputed Frobenius map a -> a^(2^k)
+    # The map is GF(2)-linear, so it is fully described by the images of
+    # x^j which are (x^(2^k))^j. Applying it costs 16 table lookups
+    # instead of k squarings.
+    def __init__(self, k: int):
+        self._k = k % 128
+
+        image_x = 2
+        for _ in range(self._k): image_x = ff_square(image_x)
+
+        basis = [1]
+        for _ in range(127): basis.append(ff_reduce(clmul(basis[-1], image_x)))
+        self._tables = _byte_tables(basis)
+
+    @property
+    def k(self):
+        return self._k
+
+    def apply_int(self, a: int) -> int:
+        return _apply_byte_tables(self._tables, a)
+
+    def __call__(self, a):
+        return FFPoly.from_int(self.apply_int(a.poly))
+
+# Frobenius tables are built on first use and shared afterwards
+_FROBENIUS_CACHE = {}
+
+def frobenius_map(k: int) -> FFFrobenius:
+    k %= 128
+    if k not in _FROBENIUS_CACHE:
+        _FROBENIUS_CACHE[k] = FFFrobenius(k)
+    return _FROBENIUS_CACHE[k]
+
+# Runs of at least this many squarings use a Frobenius table
+FROBENIUS_MIN_RUN = 8
+
+def ff_frobenius(a: int, k: int) -> int:
+    # a^(2^k), note that a^(2^128) = a
+    k %= 128
+    if k >= FROBENIUS_MIN_RUN:
+        return frobenius_map(k).apply_int(a)
+    for _ in range(k): a = ff_square(a)
+    return a
+
 def rand_ffpoly(degree: int):
     return FFPoly(random.randint(0, (1<<degree)-1))
 
 class FFPoly:
-    def __init__(self, block):
-        self._field = (1<<128)|(1<<7)|(1<<2)|(1<<1)|(1<<0)
-        if isinstance(block, bytes):
-            self._block = block
-            self._poly = block_to_poly(block)
-        elif isinstance(block, int):
-            # calculate just-in-time for performance
-            self._block = None
-            self._poly = block
+    # Immutable element of GF(2^128)
+    # Only the polynomial and a lazily computed block are stored per
+    # instance, the field is shared by all elements
+    __slots__ = ("_poly", "_block")
+    _field = FIELD
+
+    def __new__(cls, block):
+        if isinstance(block, int):
+            if block >> 128: block = ff_reduce(block)
+            return cls.from_int(block)
         elif isinstance(block, FFPoly):
-            assert block.field == self.field, "Fields do not match"
-            self._block = block.block
-            self._poly = block.poly
+            # immutable, so we can share the instance
+            return block
+        elif isinstance(block, bytes):
+            self = cls.from_int(ff_reduce(block_to_poly(block)))
+            if len(block) == 16 and self._block is None: self._block = block
+            return self
         elif isinstance(block, str):
-            self._block = str_to_block(block)
-            self._poly = str_to_poly(block)
+            return cls(str_to_poly(block))
         else:
             raise TypeError(f"Invalid type for FFPoly: {type(block)}")
 
-        if self._poly > self._field:
-            self.reduce()
-            self._block = poly_to_block(self._poly)
-
-    def reduce(self):
-        mod = self._field
-        shift = self._poly.bit_length() - mod.bit_length()
-        while shift >= 0:
-            self._poly ^= mod << shift
-            shift = self._poly.bit_length() - mod.bit_length()
+    @classmethod
+    def from_int(cls, poly: int):
+        # Trusted constructor without any validation
+        # poly must already be reduced (smaller than 2^128)
+        if poly < 2 and _INTERNED: return _INTERNED[poly]
+        self = object.__new__(cls)
+        self._poly = poly
+        # calculate just-in-time for performance
+        self._block = None
+        return self
+
+    def __reduce__(self):
+        # __new__ needs an argument, pickle and deepcopy go through the
+        # trusted constructor, which also keeps 0 and 1 interned
+        return (FFPoly.from_int, (self._poly,))
 
     @property
     def poly(self):
@@ -100,7 +332,7 @@ class FFPoly:
 
     @property
     def exponents(self):
-        return block_to_exponents(self.block)
+        return poly_to_exponents(self._poly)
 
     @property
     def degree(self):
@@ -112,76 +344,82 @@ class FFPoly:
 
     @property
     def copy(self):
-        return FFPoly(self._poly)
+        # immutable, so no copy is needed
+        return self
 
     @property
     def inverse(self):
-        exponent = 2 ** 128 - 2
-        return FFPoly(self ** exponent)
+        return FFPoly.from_int(ff_inverse(self._poly))
 
-    # combined multiplication and modular reduction
+    @property
+    def square(self):
+        return FFPoly.from_int(ff_square(self._poly))
+
+    def frobenius(self, k: int):
+        # self^(2^k)
+        return FFPoly.from_int(ff_frobenius(self._poly, k))
+
+    # carry-less multiplication followed by a single modular reduction
     def __mul__(self, other):
-        b = other.poly
+        b = other._poly
         if b == 1: return self
 
-        a = self.poly
-        #if a == 1: return other
-
-        m = self.field
+        a = self._poly
+        if a == 1: return other
 
         # Performance optimization
-        if a == 0 or b == 0: return FFPoly(0)
-
-        # Pre-compute a ^= m if a is consistently larger than m
-        if a > m: a ^= m
+        if a == 0 or b == 0: return _ZERO
+        if a == b: return FFPoly.from_int(ff_square(a))
 
-        c = 0
-        m_bit_length = m.bit_length()
-        while b > 0:
-            if b & 1: c ^= a
-            b >>= 1
-            a <<= 1
-            if a.bit_length() >= m_bit_length: a ^= m
-        return FFPoly(c)
+        return FFPoly.from_int(ff_reduce(clmul(a, b)))
 
-    # square and multiply algorithm
+    # left-to-right square and multiply algorithm
     def __pow__(self, power):
-        res = FFPoly(1)
-        base = FFPoly(self.poly)
-        while power > 0:
-            if power & 1:
-                res *= base
-            base *= base
-            if base == 1: break
-            power >>= 1
-        return res
+        if power == 0: return _ONE
+        a = self._poly
+        if a == 0: return _ZERO
+
+        # a^(2^128 - 1) = 1 for every non-zero a
+        power %= (1 << 128) - 1
+
+        # Every '1' in the exponent is a squaring plus a multiplication,
+        # every following run of k zeros is the Frobenius map a -> a^(2^k)
+        res = 1
+        for zeros in format(power, "b").split("1")[1:]:
+            res = ff_reduce(clmul(ff_square(res), a))
+            res = ff_frobenius(res, len(zeros))
+        return FFPoly.from_int(res)
 
     def __floordiv__(self, other):
         if other == 0:
             raise ZeroDivisionError("Cannot divide by zero")
-        # TODO: optimize
         return self * other.inverse
 
     def __truediv__(self, other):
         return self // other
 
     def __xor__(self, other):
-        return FFPoly(self.poly ^ other.poly)
+        return FFPoly.from_int(self._poly ^ other._poly)
 
     def __add__(self, other):
-        return FFPoly(self.poly ^ other.poly)
+        return FFPoly.from_int(self._poly ^ other._poly)
 
     def __neg__(self):
-        return FFPoly(0) - self
+        # -a = a in characteristic 2
+        return self
 
     def __sub__(self, other):
-        return FFPoly(self.poly ^ other.poly)
+        return FFPoly.from_int(self._poly ^ other._poly)
 
     def __eq__(self, other) -> bool:
         if isinstance(other, int):
-            return self.poly == other
+            return self._poly == other
         else:
-            return self.poly == other.poly
+            return self._poly == other._poly
+
+    def __hash__(self) -> int:
+        # consistent with __eq__ for comparisons with int
+        return hash(self._poly)
 
     def __lt__(self, other) -> bool:
         if isinstance(other, int):
@@ -196,15 +434,16 @@ class FFPoly:
             return self.poly > other.poly
 
     def __mod__(self, other):
-        if self._poly < other.poly:
-            return FFPoly(self)
+        mod = other.poly
+        if mod == 0:
+            raise ZeroDivisionError("Modulo by zero")
 
-        res = self.copy
-        shift = self._poly.bit_length() - other.poly.bit_length()
+        res = self._poly
+        shift = res.bit_length() - mod.bit_length()
         while shift >= 0:
-            res._poly ^= other.poly << shift
-            shift = res._poly.bit_length() - other.poly.bit_length()
-        return FFPoly(res)
+            res ^= mod << shift
+            shift = res.bit_length() - mod.bit_length()
+        return FFPoly.from_int(res)
 
     def __str__(self) -> str:
         formatted = ""
@@ -215,3 +454,61 @@ class FFPoly:
         # Cosmetic changes to the string
         formatted = formatted.replace("x^1 ", "x ").replace("x^0", "1")
         return formatted[:-3]
+
+# 0 and 1 are by far the most common elements, so share them
+_INTERNED = ()
+_ZERO = FFPoly.from_int(0)
+_ONE = FFPoly.from_int(1)
+_INTERNED = (_ZERO, _ONE)
+
+class FFAccumulator:
+    # Sum of products a1 * b1 + a2 * b2 + ... with lazy reduction
+    # The unreduced carry-less products (up to 255 bits) are XORed into a
+    # wide register and the sum is only reduced once when it is read
+    __slots__ = ("_register",)
+
+    def __init__(self):
+        self._register = 0
+
+    def add(self, a):
+        self._register ^= a.poly
+
+    def add_product(self, a, b):
+        self._register ^= clmul(a.poly, b.poly)
+
+    def add_products(self, pairs):
+        for a, b in pairs:
+            self._register ^= clmul(a.poly, b.poly)
+
+    @property
+    def value(self):
+        return FFPoly.from_int(ff_reduce(self._register))
+
+class FFMultiplier:
+    # Keyed multiplier for a fixed operand h (Shoup's method)
+    # For every byte position i of the other operand we precompute
+    # h * (n * x^(8i)) mod field for all 256 byte values n. Because
+    # multiplication is linear, a product is then just the XOR of 16
+    # table lookups instead of a 128 step shift-and-add loop.
+    def __init__(self, h):
+        if not isinstance(h, FFPoly):
+            h = FFPoly(h)
+        self._h = h
+
+        # h * x^j for j = 0..127
+        basis = [h.poly]
+        for _ in range(127):
+            base = basis[-1] << 1
+            if base >> 128: base ^= FIELD
+            basis.append(base)
+        self._tables = _byte_tables(basis)
+
+    @property
+    def h(self):
+        return self._h
+
+    def mul_int(self, a: int) -> int:
+        return _apply_byte_tables(self._tables, a)
+
+    def __mul__(self, other):
+        return FFPoly.from_int(self.mul_int(other.poly))
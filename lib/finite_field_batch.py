@@ -0,0 +1,168 @@
+import numpy as np
+
+from lib.finite_field import FFPoly, FIELD, MASK_64, _REVERSE_BITS
+
+# Batched GF(2^128) arithmetic with NumPy
+# N field elements are stored as an (N, 2) uint64 array, column 0 holds the
+# coefficients of x^0 .. x^63 and column 1 the coefficients of x^64 .. x^127
+
+# Spread every byte to 16 bits for squaring (bit i moves to bit 2i)
+_SQUARE_TABLE = np.array([int(format(i, "b"), 4) for i in range(256)], dtype="<u2")
+
+def zeros(n: int) -> np.ndarray:
+    return np.zeros((n, 2), dtype=np.uint64)
+
+def from_ints(polys: list) -> np.ndarray:
+    arr = zeros(len(polys))
+    arr[:, 0] = [p & MASK_64 for p in polys]
+    arr[:, 1] = [p >> 64 for p in polys]
+    return arr
+
+def to_ints(arr: np.ndarray) -> list:
+    return [(int(hi) << 64) | int(lo) for lo, hi in arr.tolist()]
+
+def from_ffpolys(elements: list) -> np.ndarray:
+    return from_ints([e.poly for e in elements])
+
+def to_ffpolys(arr: np.ndarray) -> list:
+    return [FFPoly.from_int(p) for p in to_ints(arr)]
+
+def from_blocks(data: bytes) -> np.ndarray:
+    # Convert a buffer of N 16 byte GCM blocks in one go
+    assert len(data) % 16 == 0, "Data must be a multiple of 16 bytes"
+    reflected = data.translate(_REVERSE_BITS)
+    return np.frombuffer(reflected, dtype="<u8").reshape(-1, 2).astype(np.uint64)
+
+def to_blocks(arr: np.ndarray) -> bytes:
+    return np.ascontiguousarray(arr, dtype="<u8").tobytes().translate(_REVERSE_BITS)
+
+def add(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return a ^ b
+
+def _clmul64(x: np.ndarray, y: np.ndarray) -> tuple:
+    # Carry-less product of two uint64 vectors, returns (low, high) words
+    lo = np.zeros_like(x)
+    hi = np.zeros_like(x)
+    one = np.uint64(1)
+    for i in range(64):
+        # all ones where bit i of y is set
+        mask = np.uint64(0) - ((y >> np.uint64(i)) & one)
+        lo ^= (x << np.uint64(i)) & mask
+        if i: hi ^= (x >> np.uint64(64 - i)) & mask
+    return lo, hi
+
+def clmul(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # Unreduced carry-less product, returns an (N, 4) array of 64 bit words
+    # Karatsuba: three 64 bit products instead of four
+    a0, a1 = a[:, 0], a[:, 1]
+    b0, b1 = b[:, 0], b[:, 1]
+    lo_lo, lo_hi = _clmul64(a0, b0)
+    hi_lo, hi_hi = _clmul64(a1, b1)
+    mid_lo, mid_hi = _clmul64(a0 ^ a1, b0 ^ b1)
+    mid_lo ^= lo_lo ^ hi_lo
+    mid_hi ^= lo_hi ^ hi_hi
+
+    res = np.empty((len(a0), 4), dtype=np.uint64)
+    res[:, 0] = lo_lo
+    res[:, 1] = lo_hi ^ mid_lo
+    res[:, 2] = hi_lo ^ mid_hi
+    res[:, 3] = hi_hi
+    return res
+
+def reduce(c: np.ndarray) -> np.ndarray:
+    # Fold the upper 128 bits of a 256 bit (N, 4) array back into the field
+    # using x^128 = x^7 + x^2 + x + 1
+    w0, w1, w2, w3 = c[:, 0], c[:, 1], c[:, 2], c[:, 3]
+    s1, s2, s7 = np.uint64(1), np.uint64(2), np.uint64(7)
+    s63, s62, s57 = np.uint64(63), np.uint64(62), np.uint64(57)
+
+    # high * (x^7 + x^2 + x + 1), bits above x^127 are carried out
+    lo = w2 ^ (w2 << s1) ^ (w2 << s2) ^ (w2 << s7)
+    hi = w3 ^ (w3 << s1) ^ (w3 << s2) ^ (w3 << s7) ^ (w2 >> s63) ^ (w2 >> s62) ^ (w2 >> s57)
+    carry = (w3 >> s63) ^ (w3 >> s62) ^ (w3 >> s57)
+    # The carry has at most 7 bits, folding it once more cannot overflow
+    lo ^= carry ^ (carry << s1) ^ (carry << s2) ^ (carry << s7)
+
+    res = np.empty((len(w0), 2), dtype=np.uint64)
+    res[:, 0] = w0 ^ lo
+    res[:, 1] = w1 ^ hi
+    return res
+
+def mul(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return reduce(clmul(a, b))
+
+def square(a: np.ndarray) -> np.ndarray:
+    spread = _SQUARE_TABLE[np.ascontiguousarray(a, dtype="<u8").view(np.uint8)]
+    return reduce(spread.view("<u8").reshape(-1, 4).astype(np.uint64))
+
+def inverse(a: np.ndarray) -> np.ndarray:
+    # Itoh-Tsujii: a^-1 = (a^(2^127 - 1))^2 with the addition chain
+    # 1, 2, 3, 6, 7, 14, 15, 30, 31, 62, 63, 126, 127 for 2^k - 1
+    # Only 12 multiplications, zero is mapped to zero
+    beta, k = a, 1
+    for step in [2, 3, 6, 7, 14, 15, 30, 31, 62, 63, 126, 127]:
+        if step == 2 * k:
+            # a^(2^2k - 1) = (a^(2^k - 1))^(2^k) * a^(2^k - 1)
+            frobenius = beta
+            for _ in range(k): frobenius = square(frobenius)
+            beta = mul(frobenius, beta)
+        else:
+            # a^(2^(k+1) - 1) = (a^(2^k - 1))^2 * a
+            beta = mul(square(beta), a)
+        k = step
+    return square(beta)
+
+class BatchMultiplier:
+    # Keyed multiplier for one fixed operand per lane, or a single FFPoly
+    # for all lanes. Like FFMultiplier, but with 4 bit tables so that the
+    # tables of many keys fit into memory:
+    #   tables[i][n] = h * (n * x^(4i)) for i = 0..31 and n = 0..15
+    # A multiplication is a single gather of all 32 table entries per lane
+    def __init__(self, h):
+        # h * x^j for j = 0..127 as (128, lanes, 2) array
+        if isinstance(h, FFPoly):
+            # a single key is cheaper to shift with ints
+            basis = [h.poly]
+            for _ in range(127):
+                base = basis[-1] << 1
+                if base >> 128: base ^= FIELD
+                basis.append(base)
+            basis = from_ints(basis).reshape(128, 1, 2)
+        else:
+            basis = [h]
+            one, s63 = np.uint64(1), np.uint64(63)
+            for _ in range(127):
+                base = basis[-1]
+                carry = base[:, 1] >> s63
+                base = np.stack([base[:, 0] << one, (base[:, 1] << one) | (base[:, 0] >> s63)], axis=1)
+                # x^128 = x^7 + x^2 + x + 1
+                base[:, 0] ^= (np.uint64(0) - carry) & np.uint64(0x87)
+                basis.append(base)
+            basis = np.stack(basis)
+        self._lanes = basis.shape[1]
+
+        # Build all 16 combinations for all 32 nibble positions at once
+        basis = basis.reshape(32, 4, self._lanes, 2)
+        tables = np.zeros((32, 16, self._lanes, 2), dtype=np.uint64)
+        for n in range(1, 16):
+            lowest_bit = n & -n
+            tables[:, n] = tables[:, n ^ lowest_bit] ^ basis[:, lowest_bit.bit_length() - 1]
+
+        # Entry n of lane j at nibble position i is at (i * 16 + n) * lanes + j
+        self._tables_lo = tables[..., 0].ravel()
+        self._tables_hi = tables[..., 1].ravel()
+        self._shifts = np.array([4 * (i % 16) for i in range(32)], dtype=np.uint64)[:, None]
+        self._words = np.array([i // 16 for i in range(32)])
+        self._offsets = (np.arange(32, dtype=np.intp) * 16 * self._lanes)[:, None]
+
+    def __mul__(self, a: np.ndarray) -> np.ndarray:
+        # (32, N) nibbles of every element
+        nibbles = (a[:, self._words].T >> self._shifts) & np.uint64(15)
+        index = nibbles.astype(np.intp) * self._lanes + self._offsets
+        # single key: every lane uses lane 0 of the tables
+        if self._lanes > 1: index += np.arange(len(a))
+
+        res = np.empty((len(a), 2), dtype=np.uint64)
+        res[:, 0] = np.bitwise_xor.reduce(np.take(self._tables_lo, index), axis=0)
+        res[:, 1] = np.bitwise_xor.reduce(np.take(self._tables_hi, index), axis=0)
+        return res
@@ -1,12 +1,357 @@
-from lib.finite_field import FFPoly, rand_ffpoly
+from lib.finite_field import FFPoly, FFMultiplier, ff_reduce, ff_inverse, ff_batch_inverse, ff_square, ff_frobenius, rand_ffpoly, FROBENIUS_MIN_RUN
+from lib import finite_field
 import re
 
+try:
+    # NumPy is optional, it is only used for coefficient-wise operations
+    # on long polynomials
+    from lib import finite_field_batch
+except ImportError:
+    finite_field_batch = None
+
+# Coefficient-wise operations on at least this many coefficients use NumPy
+BATCH_MIN_LENGTH = 32
+
+# Products where both factors have at least this many coefficients use Karatsuba
+KARATSUBA_THRESHOLD = 4
+
+# Moduli of at least this degree are reduced with Barrett instead of long division
+BARRETT_THRESHOLD = 28
+
+# Default window size (in exponent bits) for sliding-window exponentiation
+POW_WINDOW = 4
+
+# Repunit exponents like (q - 1) / 3 use cached Frobenius tables. Building
+# them costs about 4 n modular multiplications for a modulus of degree n,
+# so from this degree on only a modulus with existing tables uses them
+REPUNIT_THRESHOLD = 12
+
+# GCDs of polynomials with at least this many coefficients use half-GCD,
+# which falls back to Euclid steps below HGCD_BASE_SIZE coefficients
+HGCD_THRESHOLD = 1024
+HGCD_BASE_SIZE = 256
+
+# Horner evaluation of at least this many coefficients uses keyed multiplier tables
+HORNER_TABLE_THRESHOLD = 160
+
+# Products where the number of nonzero term pairs is at most this fraction
+# of all coefficient pairs only multiply the nonzero terms
+SPARSE_DENSITY = 0.05
+
 def rand_poly(degree: int) -> list:
     return Poly([rand_ffpoly(128) for i in range(degree+1)])
 
+# The following helpers work on lists of raw ints (coefficients as integers)
+# and return unreduced products: every coefficient is a sum of carry-less
+# products with up to 255 bits and has to be reduced with ff_reduce once
+
+def _add_raw(a: list, b: list) -> list:
+    if len(a) < len(b): a, b = b, a
+    res = a[:]
+    for i, c in enumerate(b): res[i] ^= c
+    return res
+
+def _mul_schoolbook(a: list, b: list) -> list:
+    # look up the selected backend once
+    clmul = finite_field.clmul
+
+    # preallocate list of wide registers, one per result coefficient
+    res = [0]*(len(a) + len(b) - 1)
+
+    # "HäNdE sChÜtTeLn" :)
+    for a_pow, a_coeff in enumerate(a):
+        if a_coeff == 0: continue
+        for b_pow, b_coeff in enumerate(b):
+            res[a_pow + b_pow] ^= clmul(a_coeff, b_coeff)
+    return res
+
+def _mul_karatsuba(a: list, b: list) -> list:
+    # (a0 + a1 X^m)(b0 + b1 X^m) = a0 b0 + ((a0 + a1)(b0 + b1) - a0 b0 - a1 b1) X^m + a1 b1 X^2m
+    # Three half-size products instead of four
+    # Sums of reduced coefficients are still reduced, so the recursion can
+    # work on raw ints and the result is reduced only once at the end
+    if len(a) < len(b): a, b = b, a
+    if len(b) < KARATSUBA_THRESHOLD:
+        return _mul_schoolbook(a, b)
+
+    res = [0]*(len(a) + len(b) - 1)
+    m = len(a) // 2
+    if len(b) <= m:
+        # very unbalanced: only split the larger factor
+        for shift, part in ((0, a[:m]), (m, a[m:])):
+            for i, c in enumerate(_mul_karatsuba(part, b)): res[shift + i] ^= c
+        return res
+
+    a0, a1 = a[:m], a[m:]
+    b0, b1 = b[:m], b[m:]
+    low = _mul_karatsuba(a0, b0)
+    high = _mul_karatsuba(a1, b1)
+    mid = _mul_karatsuba(_add_raw(a0, a1), _add_raw(b0, b1))
+
+    for i, c in enumerate(low):
+        res[i] ^= c
+        res[m + i] ^= c
+    for i, c in enumerate(high):
+        res[2*m + i] ^= c
+        res[m + i] ^= c
+    for i, c in enumerate(mid):
+        res[m + i] ^= c
+    return res
+
+def _mul_sparse(a: dict, b: dict) -> dict:
+    # Product of two {exponent: coefficient} maps, unreduced like the others
+    clmul = finite_field.clmul
+    res = {}
+    for a_pow, a_coeff in a.items():
+        for b_pow, b_coeff in b.items():
+            res[a_pow + b_pow] = res.get(a_pow + b_pow, 0) ^ clmul(a_coeff, b_coeff)
+    return res
+
+def _terms_raw(a: list) -> dict:
+    return {i: c for i, c in enumerate(a) if c}
+
+def _dense_raw(terms: dict, length: int) -> list:
+    res = [0] * length
+    for i, c in terms.items(): res[i] ^= c
+    return res
+
+def _mul_raw(a: list, b: list) -> list:
+    # Sparse operands: only multiply the nonzero terms
+    terms_a, terms_b = _terms_raw(a), _terms_raw(b)
+    if len(terms_a) * len(terms_b) <= SPARSE_DENSITY * len(a) * len(b):
+        return _dense_raw(_mul_sparse(terms_a, terms_b), len(a) + len(b) - 1)
+    return _mul_karatsuba(a, b)
+
+def _square_raw(a: list) -> list:
+    # (a_0 + a_1 X + ...)^2 = a_0^2 + a_1^2 X^2 + ... in characteristic 2,
+    # the mixed terms appear twice and cancel. The result is already reduced.
+    res = [0] * (2*len(a) - 1)
+    res[::2] = [ff_square(c) for c in a]
+    return res
+
+def _pow_raw(base: list, exp: int, square, mul, window: int = POW_WINDOW) -> list:
+    # Left-to-right sliding-window exponentiation for exp >= 1
+    # square(a) and mul(a, b) return reduced raw lists, e.g. modulo a polynomial
+    assert exp >= 1, "Exponent must be positive"
+    assert window >= 1, "Window size must be positive"
+
+    # Precompute the odd powers base^1, base^3, ..., base^(2^window - 1)
+    odd_powers = [base]
+    if exp > 2 and window > 1:
+        base_square = square(base)
+        for _ in range((min(2**window - 1, exp) + 1) // 2 - 1):
+            odd_powers.append(mul(odd_powers[-1], base_square))
+
+    bits = format(exp, "b")
+    res = None
+    i = 0
+    while i < len(bits):
+        if bits[i] == "0":
+            res = square(res)
+            i += 1
+            continue
+
+        # Longest window starting at i that ends with a one bit
+        j = min(i + window, len(bits))
+        while bits[j-1] == "0": j -= 1
+        power = odd_powers[int(bits[i:j], 2) // 2]
+
+        if res is None:
+            res = power
+        else:
+            for _ in range(j - i): res = square(res)
+            res = mul(res, power)
+        i = j
+    return res
+
+def _repunit(exp: int) -> tuple:
+    # Returns (s, k) if exp = 1 + 2^s + 2^2s + ... + 2^((k-1)s) with k >= 4,
+    # e.g. (2^128 - 1) / 3 = 0x5555...5 with s = 2 and k = 64
+    for s in range(1, exp.bit_length() + 1):
+        total = exp * ((1 << s) - 1) + 1
+        if total & (total - 1) == 0:
+            bits = total.bit_length() - 1
+            if bits % s == 0 and bits // s >= 4: return s, bits // s
+            return None
+    return None
+
+def _strip_raw(a: list) -> list:
+    while len(a) > 1 and a[-1] == 0: a.pop()
+    return a
+
+def _divmod_raw(a: list, b: list) -> tuple:
+    # Long division of reduced coefficient lists, b must not have leading zeros
+    # The leading coefficient of b is inverted only once and the remainder is
+    # updated in place in a single buffer of wide registers. A register is
+    # only reduced when it becomes the leading coefficient.
+    clmul = finite_field.clmul
+    divisor_degree = len(b) - 1
+    if len(a) <= divisor_degree:
+        return [0], a[:]
+
+    # Monic divisors (the usual case) need no scaling at all
+    lead_inverse = ff_inverse(b[-1])
+    lower = [(i, c) for i, c in enumerate(b[:-1]) if c]
+
+    rem = a[:]
+    quotient = [0] * (len(a) - divisor_degree)
+    for shift in range(len(quotient) - 1, -1, -1):
+        # rem[shift + divisor_degree] is the current leading coefficient
+        coeff = ff_reduce(rem.pop())
+        if coeff == 0: continue
+        if lead_inverse != 1: coeff = ff_reduce(clmul(coeff, lead_inverse))
+        quotient[shift] = coeff
+
+        for i, c in lower:
+            rem[shift + i] ^= clmul(coeff, c)
+
+    return quotient, _strip_raw([ff_reduce(c) for c in rem] or [0])
+
+# Half-GCD on raw coefficient lists
+# A 2x2 matrix of polynomials is a tuple (m00, m01, m10, m11), the zero
+# polynomial is [0] and has size 0 (number of coefficients otherwise)
+
+_IDENTITY = ([1], [0], [0], [1])
+
+def _size_raw(a: list) -> int:
+    return 0 if a == [0] else len(a)
+
+def _mul_reduced(a: list, b: list) -> list:
+    return _strip_raw([ff_reduce(c) for c in _mul_raw(a, b)])
+
+def _add_reduced(a: list, b: list) -> list:
+    return _strip_raw(_add_raw(a, b))
+
+def _dot_reduced(a: list, b: list, c: list, d: list) -> list:
+    # a * b + c * d, both products are reduced together
+    return _strip_raw([ff_reduce(e) for e in _add_raw(_mul_raw(a, b), _mul_raw(c, d))])
+
+def _matrix_apply(m: tuple, a: list, b: list) -> tuple:
+    m00, m01, m10, m11 = m
+    return _dot_reduced(m00, a, m01, b), _dot_reduced(m10, a, m11, b)
+
+def _matrix_mul(m: tuple, n: tuple) -> tuple:
+    m00, m01, m10, m11 = m
+    n00, n01, n10, n11 = n
+    return (_dot_reduced(m00, n00, m01, n10), _dot_reduced(m00, n01, m01, n11),
+            _dot_reduced(m10, n00, m11, n10), _dot_reduced(m10, n01, m11, n11))
+
+def _euclid_step(m: tuple, q: list) -> tuple:
+    # ((0, 1), (1, -q)) * m, the minus sign vanishes in characteristic 2
+    m00, m01, m10, m11 = m
+    return (m10, m11, _add_reduced(m00, _mul_reduced(q, m10)), _add_reduced(m01, _mul_reduced(q, m11)))
+
+def _hgcd_lift(m: tuple, high: tuple, a: list, b: list, k: int) -> tuple:
+    # m * (a, b) from m * (a // X^k, b // X^k) = high: only the lower k
+    # coefficients of a and b still have to be multiplied
+    low = _matrix_apply(m, _strip_raw(a[:k]), _strip_raw(b[:k]))
+    return tuple(_add_reduced([0]*k + h, l) for h, l in zip(high, low))
+
+def _hgcd_raw(a: list, b: list) -> tuple:
+    # Returns (M, c, d) where M is a product of Euclid steps with
+    # M * (a, b) = (c, d) and size(d) <= size(a) / 2 < size(c), i.e. the first
+    # half of the remainder sequence. It is computed from the upper halves of
+    # a and b only. Requires size(a) > size(b).
+    n = _size_raw(a)
+    k = (n + 1) // 2
+    if _size_raw(b) <= k:
+        return _IDENTITY, a, b
+
+    if n < HGCD_BASE_SIZE:
+        # Plain Euclid steps for small inputs
+        m = _IDENTITY
+        while _size_raw(b) > k:
+            q, r = _divmod_raw(a, b)
+            m = _euclid_step(m, q)
+            a, b = b, r
+        return m, a, b
+
+    # First half of the remainder sequence from the upper half of a and b
+    m, *high = _hgcd_raw(a[k:], b[k:])
+    a, b = _hgcd_lift(m, high, a, b, k)
+    if _size_raw(b) <= k:
+        return m, a, b
+
+    # One regular Euclid step
+    q, r = _divmod_raw(a, b)
+    m = _euclid_step(m, q)
+    a, b = b, r
+    if _size_raw(b) <= k:
+        return m, a, b
+
+    # Second half, again only with the upper parts
+    j = 2*k - _size_raw(a) + 1
+    step, *high = _hgcd_raw(a[j:], b[j:])
+    a, b = _hgcd_lift(step, high, a, b, j)
+    return _matrix_mul(step, m), a, b
+
+def _gcd_raw(a: list, b: list, cofactors: bool = False) -> tuple:
+    # Returns (g, m) with m * (a, b) = (g, 0), g is not normalised
+    # m is only tracked if cofactors are requested
+    m = _IDENTITY if cofactors else None
+    if _size_raw(a) < _size_raw(b):
+        a, b = b, a
+        if cofactors: m = ([0], [1], [1], [0])
+
+    while b != [0]:
+        if _size_raw(a) >= HGCD_THRESHOLD:
+            step, a, b = _hgcd_raw(a, b)
+            if cofactors: m = _matrix_mul(step, m)
+            if b == [0]: break
+
+        q, r = _divmod_raw(a, b)
+        if cofactors: m = _euclid_step(m, q)
+        a, b = b, r
+
+    return a, m
+
+def _horner_raw(a: list, x: int) -> int:
+    # a(x) with one multiplication per coefficient
+    if len(a) >= HORNER_TABLE_THRESHOLD:
+        # The tables pay off for long polynomials
+        mul = FFMultiplier(FFPoly.from_int(x)).mul_int
+    else:
+        clmul = finite_field.clmul
+        def mul(c): return ff_reduce(clmul(c, x))
+
+    res = 0
+    for c in reversed(a):
+        res = mul(res) ^ c
+    return res
+
+def _horner_batch(a: list, points: list) -> list:
+    # Horner for all points at once, one lane per point
+    x = finite_field_batch.BatchMultiplier(finite_field_batch.from_ints(points))
+    res = finite_field_batch.zeros(len(points))
+    for c in finite_field_batch.from_ints(a[::-1]):
+        res = (x * res) ^ c
+    return finite_field_batch.to_ints(res)
+
+def _scale_raw(a: list, scalar: int) -> list:
+    # Multiply all coefficients with the same field element
+    if finite_field_batch is not None and len(a) >= BATCH_MIN_LENGTH:
+        scalar = finite_field_batch.BatchMultiplier(FFPoly.from_int(scalar))
+        return finite_field_batch.to_ints(scalar * finite_field_batch.from_ints(a))
+    if len(a) >= HORNER_TABLE_THRESHOLD:
+        return [FFMultiplier(FFPoly.from_int(scalar)).mul_int(c) for c in a]
+
+    clmul = finite_field.clmul
+    return [ff_reduce(clmul(c, scalar)) for c in a]
+
 class Poly:
     # Polynomial is represented as a list of coefficients
     # [1, 2, 3] = 1 + 2x + 3x^2 = 3x^2 + 2x + 1
+    # The coefficients are stored as raw ints (the poly value of FFPoly),
+    # FFPoly objects are only created when coefficients are accessed
+    @classmethod
+    def from_raw(cls, coeffs: list):
+        # Trusted constructor from reduced raw int coefficients,
+        # the list is taken over and not copied
+        poly = cls.__new__(cls)
+        poly._coeffs = coeffs or [0]
+        poly.strip()
+        return poly
+
     def init_from_str(self, coeffs):
         coeffs = coeffs.replace(" X ", " X^1 ").replace("*", " ")
 
@@ -14,7 +359,7 @@ class Poly:
         #       Example: (1) X^4 + (x + 1) X^3 + (x + 1) X^2
         #       Result:  ["1", "x + 1", "x + 1", "0, 1"]
         all_coeffs = re.findall(r"\((.*?)\)", coeffs)
-        all_coeffs = [FFPoly(i) for i in all_coeffs]
+        all_coeffs = [FFPoly(i).poly for i in all_coeffs]
 
         # Step 2: Get all exponents
         #       Example: (1) X^4 + (x + 1) X^3 + (1) X + (x^2 + 1)
@@ -37,19 +382,16 @@ class Poly:
             if i in all_exponents:
                 out_coeffs.append(all_coeffs[all_exponents.index(i)])
             else:
-                out_coeffs.append(FFPoly(0))
+                out_coeffs.append(0)
 
         return out_coeffs
 
     def init_from_list(self, coeffs):
         # If coeffs is empty, create a zero polynomial
-        if len(coeffs) == 0: return [FFPoly(0)]
+        if len(coeffs) == 0: return [0]
 
-        # All elements should be of type FFPoly
-        if isinstance(coeffs[0], FFPoly):
-            return [c for c in coeffs]
-        else:
-            return [FFPoly(c) for c in coeffs]
+        # Elements are FFPoly or anything FFPoly accepts
+        return [c.poly if isinstance(c, FFPoly) else FFPoly(c).poly for c in coeffs]
 
     def __init__(self, coeffs) -> None:
         self._coeffs = []
@@ -64,20 +406,26 @@ class Poly:
         self.strip()
 
     def strip(self) -> None:
-        while self._coeffs and self._coeffs[-1] == 0 and len(self) > 1:
+        while len(self._coeffs) > 1 and self._coeffs[-1] == 0:
             self._coeffs.pop()
 
     @property
     def coeffs(self) -> list:
+        return [FFPoly.from_int(c) for c in self._coeffs]
+
+    @property
+    def raw(self) -> list:
+        # The coefficients as ints, must not be modified
         return self._coeffs
 
     @property
     def inverse(self):
-        return Poly([i.inverse for i in self.coeffs])
+        # Coefficient-wise inverse with a single field inversion
+        return Poly.from_raw(ff_batch_inverse(self._coeffs))
 
     @property
     def copy(self):
-        return Poly([i.copy for i in self.coeffs])
+        return Poly.from_raw(self._coeffs[:])
 
     @property
     def degree(self) -> int:
@@ -85,35 +433,38 @@ class Poly:
 
     @property
     def is_zero(self) -> bool:
-        return self.degree == 0 and self._coeffs[0] == 0
+        return self._coeffs == [0]
 
     @property
     def is_gt_or_equal_one(self) -> bool:
-        return self.degree > 0 or self._coeffs[0].poly >= 1
+        return self.degree > 0 or self._coeffs[0] >= 1
 
     def __len__(self):
         return len(self._coeffs)
 
     def __getitem__(self, idx):
-        return self._coeffs[idx]
+        if isinstance(idx, slice):
+            return [FFPoly.from_int(c) for c in self._coeffs[idx]]
+        return FFPoly.from_int(self._coeffs[idx])
 
     def __setitem__(self, idx, val):
         if not isinstance(val, FFPoly):
             raise TypeError("Operand must be of type FFPoly")
 
-        self._coeffs[idx] = val
+        self._coeffs[idx] = val.poly
 
     def __str__(self) -> str:
         out = ""
         for i in range(len(self._coeffs)-1, -1, -1):
             if self._coeffs[i] == 0: continue
+            coeff = FFPoly.from_int(self._coeffs[i])
 
             if i == 0:
-                out += f"({self._coeffs[i]})"
+                out += f"({coeff})"
             elif i == 1:
-                out += f"({self._coeffs[i]}) X + "
+                out += f"({coeff}) X + "
             else:
-                out += f"({self._coeffs[i]}) X^{i} + "
+                out += f"({coeff}) X^{i} + "
 
         if out.endswith(" + "): out = out[:-3]
         if out == "": out = "0"
@@ -121,57 +472,51 @@ class Poly:
         return out
 
     def __add__(self, other):
+        if isinstance(other, SparsePoly):
+            other = other.dense
         if not isinstance(other, Poly):
             raise TypeError("Operand must be of type Poly")
 
-        l_a= len(self._coeffs)
-        l_b = len(other._coeffs)
-        smaller = l_a < l_b and self._coeffs or other._coeffs
-        larger = smaller == self._coeffs and other._coeffs or self._coeffs
-        for i in range(len(smaller)):
-            larger[i] += smaller[i]
-        return Poly(larger)
+        return Poly.from_raw(_add_raw(self._coeffs, other._coeffs))
 
     def __neg__(self):
         #return Poly([i.inverse for i in self._coeffs])
         raise NotImplementedError("Substraction is not implemented yet")
 
     def __sub__(self, other):
-        max_len = max(len(self.coeffs), len(other.coeffs))
-        a = self.coeffs + [FFPoly(0)] * (max_len - len(self.coeffs))
-        b = other.coeffs + [FFPoly(0)] * (max_len - len(other.coeffs))
-        result_coeffs = [a[i] - b[i] for i in range(max_len)]
-        return Poly(result_coeffs)
+        # Subtraction is addition in characteristic 2
+        return self + other
 
     def __mul__(self, other):
+        if isinstance(other, FFPoly):
+            return Poly.from_raw(_scale_raw(self._coeffs, other.poly))
+        if isinstance(other, SparsePoly):
+            return other * self
         if not isinstance(other, Poly):
-            raise TypeError("Operand must be of type Poly")
+            raise TypeError("Operand must be of type Poly, SparsePoly or FFPoly")
 
-        l_a= len(self._coeffs)
-        l_b = len(other._coeffs)
+        # Unreduced products are accumulated and reduced only once at the end
+        res = _mul_raw(self._coeffs, other._coeffs)
 
-        # preallocate list
-        res = [FFPoly(0)]*(l_a + l_b - 1)
+        return Poly.from_raw([ff_reduce(c) for c in res])
 
-        # "HäNdE sChÜtTeLn" :)
-        for a_pow, a_coeff in enumerate(self._coeffs):
-            for b_pow, b_coeff in enumerate(other._coeffs):
-                res[a_pow + b_pow] += a_coeff * b_coeff
-
-        return Poly(res)
+    @property
+    def square(self):
+        # Only one field squaring per coefficient
+        return Poly.from_raw(_square_raw(self.raw))
 
     def __eq__(self, other):
+        if isinstance(other, SparsePoly):
+            return other == self
         if not isinstance(other, Poly):
             raise TypeError("Operand must be of type Poly")
 
-        if len(self._coeffs) != len(other._coeffs):
-            return False
-
-        for i in range(len(self._coeffs)):
-            if self._coeffs[i] == other._coeffs[i]: continue
-            return False
+        return self._coeffs == other._coeffs
 
-        return True
+    def __hash__(self) -> int:
+        # Equal polynomials have equal coefficient lists, a Poly must not be
+        # modified while it is used as key
+        return hash(tuple(self._coeffs))
 
     def __lt_(self, other):
         if not isinstance(other, Poly):
@@ -211,48 +556,25 @@ class Poly:
     def __ge__(self, other):
         return self > other or self == other
 
-    def __mod__(self, other):
-        if other.degree < 0:
-            raise ZeroDivisionError("Modulo by zero polynomial")
-        dividend = self.copy
-        divisor_degree = other.degree
-        divisor_leading_coeff = other._coeffs[-1]
-        first_round = True
-        while dividend >= other or first_round:
-            degree_diff = dividend.degree - divisor_degree
-            leading_coeff = dividend._coeffs[-1] / divisor_leading_coeff
-            term = [FFPoly(0)] * degree_diff + [leading_coeff]
+    def __divmod__(self, other):
+        # Quotient and remainder of a single long division
+        if not isinstance(other, Poly):
+            raise TypeError("Operand must be of type Poly")
+        if other.is_zero:
+            raise ZeroDivisionError("Division by zero polynomial")
 
-            dividend -= Poly(term) * other
-            first_round = False
+        quotient, remainder = _divmod_raw(self.raw, other.raw)
+        return Poly.from_raw(quotient), Poly.from_raw(remainder)
 
-        return dividend
+    def __mod__(self, other):
+        return divmod(self, other)[1]
 
     def __truediv__(self, other):
         if isinstance(other, Poly):
-            if other.degree < 0:
-                raise ZeroDivisionError("Division by zero polynomial")
-
-            if self == other:
-                return Poly([1])
-
-            dividend = self.copy
-            divisor_degree = other.degree
-            divisor_leading_coeff = other._coeffs[-1]
-            quotient_coeffs = [FFPoly(0)] * (dividend.degree - divisor_degree + 1)
-
-            while dividend.degree >= other.degree:
-                degree_diff = dividend.degree - divisor_degree
-                leading_coeff = dividend._coeffs[-1] / divisor_leading_coeff
-                quotient_coeffs[degree_diff] = leading_coeff
-
-                term = [FFPoly(0)] * degree_diff + [leading_coeff]
-
-                dividend -= Poly(term) * other
-
-            return Poly(quotient_coeffs)
+            return divmod(self, other)[0]
         elif isinstance(other, FFPoly):
-            return Poly([i * other.inverse for i in self.coeffs])
+            # e.g. monic normalisation, the scalar is inverted only once
+            return self * other.inverse
         else:
             raise TypeError("Operand must be of type Poly or FFPoly")
 
@@ -263,50 +585,341 @@ class Poly:
         if not isinstance(exp, int):
             raise TypeError("Operand must be of type int")
         if exp == 0: return Poly([1])
-        elif exp == 1: return self.copy
-        else:
-            if exp % 2 == 0:
-                step = self ** (exp // 2)
-                return step * step
-            else:
-                step = self ** (exp // 2)
-                return step * step * self
 
-    def square_and_multiply(self, exp: int, mod):
-        if not isinstance(mod, Poly):
-            raise TypeError("Operand must be of type Poly")
+        def mul(a, b): return [ff_reduce(c) for c in _mul_raw(a, b)]
+        return Poly.from_raw(_pow_raw(self._coeffs[:], exp, _square_raw, mul))
 
-        if exp == 0:
-            return Poly([1])
-        elif exp == 1:
-            return self
-        else:
-            if exp % 2 == 0:
-                step = self.square_and_multiply(exp // 2, mod)
-                return (step * step) % mod
-            else:
-                step = self.square_and_multiply(exp // 2, mod)
-                return (step * step * self) % mod
+    def square_and_multiply(self, exp: int, mod, window: int = POW_WINDOW):
+        # mod is a Poly or a PolyModulus that can be reused between calls
+        if isinstance(mod, Poly):
+            mod = PolyModulus(mod)
+        if not isinstance(mod, PolyModulus):
+            raise TypeError("Operand must be of type Poly or PolyModulus")
+
+        return mod.pow(self, exp, window)
 
     def gcd(self, b):
         if not isinstance(b, Poly):
             raise TypeError("Operand must be of type Poly")
 
-        a = self.copy
-        while b != Poly([0]):
-            a, b = b, a % b
+        # Half-GCD for large and Euclid for small polynomials
+        a, _ = _gcd_raw(self.raw, b.raw)
 
         # Make monical
-        a = a / a[-1]
+        return Poly.from_raw(a) / FFPoly.from_int(a[-1])
+
+    def xgcd(self, b) -> tuple:
+        # Returns (g, s, t) with g = s * self + t * b and g monic
+        if not isinstance(b, Poly):
+            raise TypeError("Operand must be of type Poly")
+
+        a, m = _gcd_raw(self.raw, b.raw, cofactors=True)
 
-        return a
+        # Make monical, the cofactors are scaled by the same value
+        lead_inverse = FFPoly.from_int(a[-1]).inverse
+        g, s, t = [Poly.from_raw(c) * lead_inverse for c in (a, m[0], m[1])]
+        return g, s, t
+
+    def evaluate(self, x: FFPoly) -> FFPoly:
+        # Horner: a_0 + x (a_1 + x (a_2 + ...))
+        return FFPoly.from_int(_horner_raw(self.raw, x.poly))
+
+    def evaluate_many(self, points: list) -> list:
+        # Evaluate at many points at once, returns a list of FFPoly
+        a, points = self.raw, [p.poly for p in points]
+        if finite_field_batch is not None and len(points) >= BATCH_MIN_LENGTH:
+            values = _horner_batch(a, points)
+        else:
+            values = [_horner_raw(a, p) for p in points]
+        return [FFPoly.from_int(v) for v in values]
+
+    @property
+    def sparse(self):
+        return SparsePoly.from_raw(_terms_raw(self._coeffs))
 
     def solve(self, exponent: list):
         # Return a FFPoly by inserting the exponent into the polynomial
-        assert len(exponent) == len(self.coeffs), "Invalid exponent length: Expected %d, got %d" % (len(self.coeffs), len(exponent))
+        assert len(exponent) == len(self), "Invalid exponent length: Expected %d, got %d" % (len(self), len(exponent))
+
+        # The same point for every coefficient is a plain evaluation
+        if all(e == exponent[0] for e in exponent):
+            return self.evaluate(exponent[0])
+
+        # Unreduced products are summed and reduced once
+        clmul = finite_field.clmul
+        solution = 0
+        for degree, coeff in enumerate(self.raw):
+            solution ^= clmul(coeff, (exponent[degree] ** degree).poly)
+
+        return FFPoly.from_int(ff_reduce(solution))
+
+class PolyModulus:
+    # Precomputed reduction context for a fixed modulus m of degree n
+    # Barrett reduction: with rev(p) = X^deg(p) p(1/X) and the power series
+    # inv = rev(m)^-1 mod X^k, the quotient of a / m is
+    #   q = rev(rev(a) * inv mod X^(deg(a) - n + 1))
+    # and the remainder a - q m only needs the lowest n coefficients.
+    # Every reduction costs two multiplications instead of a long division.
+    def __init__(self, modulus: Poly) -> None:
+        if not isinstance(modulus, Poly):
+            raise TypeError("Operand must be of type Poly")
+        if modulus.is_zero:
+            raise ZeroDivisionError("Modulo by zero polynomial")
+
+        self.modulus = modulus
+        self.degree = modulus.degree
+        self._mod = modulus.raw
+        self._rev = self._mod[::-1]
+        # Extended on demand, small moduli never need it
+        self._inv = [ff_inverse(self._rev[0])]
+        # k -> images of X^i under a -> a^(2^k), filled on demand
+        self._frobenius = {}
+
+    @classmethod
+    def from_raw(cls, modulus: list):
+        return cls(Poly.from_raw(modulus))
+
+    def _extend(self, precision: int) -> None:
+        # Newton iteration g <- g (2 - rev(m) g), in characteristic 2 this is
+        # g <- rev(m) g^2, and doubles the number of correct coefficients
+        inv = self._inv
+        while len(inv) < precision:
+            k = min(2 * len(inv), precision)
+            square = _square_raw(inv)[:k]
+            inv = [ff_reduce(c) for c in _mul_raw(self._rev[:k], square)[:k]]
+        self._inv = inv
+
+    def reduce_raw(self, a: list) -> list:
+        # a is a list of wide registers (unreduced products are fine),
+        # returns the reduced remainder as raw ints
+        n = self.degree
+        if len(a) <= n:
+            return _strip_raw([ff_reduce(c) for c in a])
+        if n < BARRETT_THRESHOLD:
+            return _divmod_raw(a, self._mod)[1]
+
+        length = len(a) - n
+        if length > len(self._inv): self._extend(length)
+
+        # Quotient from the top coefficients of a
+        a_rev = [ff_reduce(c) for c in a[:n-1:-1]]
+        quotient = [ff_reduce(c) for c in _mul_raw(a_rev, self._inv[:length])[:length]][::-1]
+
+        # The higher coefficients of a - q m are zero
+        rem = a[:n]
+        for i, c in enumerate(_mul_raw(quotient[:n], self._mod[:n])[:n]):
+            rem[i] ^= c
+        return _strip_raw([ff_reduce(c) for c in rem])
+
+    def reduce(self, poly) -> Poly:
+        if isinstance(poly, SparsePoly):
+            return Poly.from_raw(self.reduce_sparse_raw(poly.raw))
+        return Poly.from_raw(self.reduce_raw(poly.raw))
+
+    def reduce_sparse_raw(self, terms: dict) -> list:
+        # Terms below X^(2n - 1) are reduced together as a dense polynomial,
+        # every higher term X^e is computed as a power of X mod m. The cost
+        # depends on the number of terms and log(e), not on the degree.
+        bound = 2 * self.degree - 1
+        low = _dense_raw({e: c for e, c in terms.items() if e < bound}, max(bound, 1))
+        res = self.reduce_raw(low)
+
+        x = Poly.from_raw([0, 1])
+        for e, c in terms.items():
+            if e < bound: continue
+            res = _add_raw(res, _scale_raw(self.pow(x, e).raw, c))
+        return _strip_raw(res)
+
+    def mul(self, a: Poly, b: Poly) -> Poly:
+        # a * b mod m, the product is reduced only once
+        return Poly.from_raw(self.reduce_raw(_mul_raw(a.raw, b.raw)))
+
+    def square(self, a: Poly) -> Poly:
+        return Poly.from_raw(self.reduce_raw(_square_raw(a.raw)))
+
+    def inverse(self, a: Poly) -> Poly:
+        # a^-1 mod m from the Bezout cofactor s in s a + t m = 1
+        g, s, _ = self.reduce(a).xgcd(self.modulus)
+        if g != Poly([1]):
+            raise ZeroDivisionError("Polynomial is not invertible modulo the modulus")
+        return s
+
+    def _frobenius_images(self, k: int) -> list:
+        # X^(i 2^k) mod m for i = 0..n-1, cached for all later calls
+        if k not in self._frobenius:
+            x_k = self.reduce_raw([0, 1])
+            for _ in range(k): x_k = self.reduce_raw(_square_raw(x_k))
+
+            images = [self.reduce_raw([1])]
+            for _ in range(1, self.degree):
+                images.append(self.reduce_raw(_mul_raw(images[-1], x_k)))
+            self._frobenius[k] = images
+        return self._frobenius[k]
+
+    def frobenius_raw(self, a: list, k: int) -> list:
+        # a^(2^k) mod m, the map is linear over GF(2):
+        #   (sum a_i X^i)^(2^k) = sum a_i^(2^k) X^(i 2^k)
+        # Short runs are plain squarings, longer ones use the cached images
+        a = self.reduce_raw(a)
+        if k < FROBENIUS_MIN_RUN or self.degree == 0:
+            for _ in range(k): a = self.reduce_raw(_square_raw(a))
+            return a
+
+        clmul = finite_field.clmul
+        res = [0] * self.degree
+        for coeff, image in zip(a, self._frobenius_images(k)):
+            if coeff == 0: continue
+            coeff = ff_frobenius(coeff, k)
+            for j, c in enumerate(image):
+                res[j] ^= clmul(coeff, c)
+        return _strip_raw([ff_reduce(c) for c in res])
+
+    def frobenius(self, a: Poly, k: int) -> Poly:
+        return Poly.from_raw(self.frobenius_raw(a.raw, k))
+
+    def _pow_repunit_raw(self, a: list, s: int, k: int) -> list:
+        # a^(1 + b + ... + b^(k-1)) with b = 2^s. With R_j = 1 + b + ... + b^(j-1)
+        #   a^R_2j = (a^R_j)^(b^j) a^R_j and a^R_(j+1) = (a^R_j)^b a
+        # so every bit of k costs one or two Frobenius maps and multiplications
+        def mul(x, y): return self.reduce_raw(_mul_raw(x, y))
+
+        res, length = a, 1
+        for bit in format(k, "b")[1:]:
+            res = mul(self.frobenius_raw(res, s * length), res)
+            length *= 2
+            if bit == "1":
+                res = mul(self.frobenius_raw(res, s), a)
+                length += 1
+        return res
+
+    def _repunit_tables_built(self, s: int, k: int) -> bool:
+        # True if every table used by _pow_repunit_raw(a, s, k) is cached
+        runs, length = [], 1
+        for bit in format(k, "b")[1:]:
+            runs.append(s * length)
+            length *= 2
+            if bit == "1":
+                runs.append(s)
+                length += 1
+        return all(run in self._frobenius for run in runs if run >= FROBENIUS_MIN_RUN)
+
+    def pow(self, base: Poly, exp: int, window: int = POW_WINDOW) -> Poly:
+        # base^exp mod m, every intermediate result is reduced right away
+        # 1 is not reduced for a constant modulus
+        if exp == 0: return Poly.from_raw(self.reduce_raw([1]))
+
+        # e.g. (q - 1) / 3 in Cantor-Zassenhaus
+        repunit = _repunit(exp)
+        if repunit is not None and (self.degree < REPUNIT_THRESHOLD or self._repunit_tables_built(*repunit)):
+            return Poly.from_raw(self._pow_repunit_raw(self.reduce_raw(base.raw), *repunit))
+
+        def square(a): return self.reduce_raw(_square_raw(a))
+        def mul(a, b): return self.reduce_raw(_mul_raw(a, b))
+        return Poly.from_raw(_pow_raw(self.reduce_raw(base.raw), exp, square, mul, window))
+
+class SparsePoly:
+    # Polynomial as a map exponent -> coefficient (raw int), only nonzero
+    # terms are stored, e.g. X^(2^128) - X has two entries. Memory and time
+    # depend on the number of terms and not on the degree.
+    # Arithmetic with a dense Poly returns a dense Poly.
+    @classmethod
+    def from_raw(cls, terms: dict):
+        # Trusted constructor, the map must not contain zero coefficients
+        poly = cls.__new__(cls)
+        poly._terms = terms
+        return poly
+
+    def __init__(self, terms: dict) -> None:
+        if not isinstance(terms, dict):
+            raise TypeError("Operand must be of type dict")
+
+        self._terms = {}
+        for exponent, coeff in terms.items():
+            coeff = coeff.poly if isinstance(coeff, FFPoly) else FFPoly(coeff).poly
+            if coeff: self._terms[exponent] = coeff
+
+    @property
+    def raw(self) -> dict:
+        # The terms as ints, must not be modified
+        return self._terms
+
+    @property
+    def terms(self) -> dict:
+        return {e: FFPoly.from_int(c) for e, c in sorted(self._terms.items())}
+
+    @property
+    def dense(self) -> Poly:
+        return Poly.from_raw(_dense_raw(self._terms, self.degree + 1))
+
+    @property
+    def degree(self) -> int:
+        return max(self._terms, default=0)
+
+    @property
+    def is_zero(self) -> bool:
+        return not self._terms
+
+    def __len__(self):
+        # Number of nonzero terms
+        return len(self._terms)
+
+    def __getitem__(self, exponent: int):
+        return FFPoly.from_int(self._terms.get(exponent, 0))
+
+    def __str__(self) -> str:
+        # Same format as Poly, without materialising the zero terms
+        out = []
+        for e, c in sorted(self._terms.items(), reverse=True):
+            if e == 0:
+                out.append(f"({FFPoly.from_int(c)})")
+            elif e == 1:
+                out.append(f"({FFPoly.from_int(c)}) X")
+            else:
+                out.append(f"({FFPoly.from_int(c)}) X^{e}")
+
+        return " + ".join(out) or "0"
 
-        solution = FFPoly(0)
-        for degree, coeff in enumerate(self.coeffs):
-            solution += coeff * (exponent[degree] ** degree)
+    def __add__(self, other):
+        if isinstance(other, Poly):
+            return self.dense + other
+        if not isinstance(other, SparsePoly):
+            raise TypeError("Operand must be of type Poly or SparsePoly")
+
+        terms = dict(self._terms)
+        for e, c in other._terms.items():
+            terms[e] = terms.get(e, 0) ^ c
+            if terms[e] == 0: del terms[e]
+        return SparsePoly.from_raw(terms)
+
+    def __sub__(self, other):
+        # Subtraction is addition in characteristic 2
+        return self + other
+
+    def __mul__(self, other):
+        if isinstance(other, FFPoly):
+            if other == 0: return SparsePoly.from_raw({})
+            return SparsePoly.from_raw(dict(zip(self._terms, _scale_raw(list(self._terms.values()), other.poly))))
+        if isinstance(other, Poly):
+            res = _dense_raw(_mul_sparse(self._terms, _terms_raw(other.raw)), self.degree + other.degree + 1)
+            return Poly.from_raw([ff_reduce(c) for c in res])
+        if not isinstance(other, SparsePoly):
+            raise TypeError("Operand must be of type Poly, SparsePoly or FFPoly")
+
+        res = {e: ff_reduce(c) for e, c in _mul_sparse(self._terms, other._terms).items()}
+        return SparsePoly.from_raw({e: c for e, c in res.items() if c})
+
+    def __mod__(self, other):
+        # The remainder is dense, e.g. X^(2^128) mod f
+        if isinstance(other, Poly):
+            other = PolyModulus(other)
+        if not isinstance(other, PolyModulus):
+            raise TypeError("Operand must be of type Poly or PolyModulus")
+        return other.reduce(self)
+
+    def __eq__(self, other):
+        if isinstance(other, Poly):
+            return self._terms == _terms_raw(other.raw)
+        if not isinstance(other, SparsePoly):
+            raise TypeError("Operand must be of type Poly or SparsePoly")
+        return self._terms == other._terms
 
-        return solution
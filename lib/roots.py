@@ -0,0 +1,32 @@
+from lib.polynomial import Poly, PolyModulus
+from lib.cantor_zassenhaus import split_factors
+
+# Root finding over GF(2^128)
+# Every element r of GF(q), q = 2^128, satisfies r^q = r, so
+#   X^q - X = product of (X - r) over all r
+# and gcd(f, X^q - X) is the product of the distinct linear factors of f.
+# Only this part has to be split, the other factors of f are never touched.
+
+def frobenius_x(modulus: PolyModulus, k: int = 128) -> Poly:
+    # X^(2^k) mod f with k squarings
+    x = modulus.reduce(Poly([0, 1]))
+    for _ in range(k):
+        x = modulus.square(x)
+    return x
+
+def linear_factor_product(f: Poly) -> Poly:
+    # Monic product of (X - r) for all distinct roots r of f
+    modulus = PolyModulus(f)
+    x_q = frobenius_x(modulus)
+    return f.gcd(x_q - Poly([0, 1]))
+
+def split_linear(g: Poly) -> list:
+    # Split a product of distinct linear factors into its roots
+    # monic: X + r, the root is r
+    linear, _ = split_factors(g)
+    return [p[0] for p in linear]
+
+def find_roots(f: Poly) -> list:
+    # All distinct roots of f as list of FFPoly
+    assert not f.is_zero, "The zero polynomial has every element as root"
+    return split_linear(linear_factor_product(f))
@@ -1,9 +1,20 @@
-from lib.finite_field import FFPoly, rand_ffpoly
+from lib.finite_field import FFPoly, FFMultiplier, FFAccumulator, blocks_to_polys, polys_to_blocks, CLMUL_BACKENDS, DEFAULT_CLMUL_BACKEND, set_clmul_backend, ff_batch_inverse, rand_ffpoly
+from lib.polynomial import Poly, PolyModulus, SparsePoly, rand_poly
+from lib import polynomial
+from lib.aes_gcm import GHASH
+from lib.cantor_zassenhaus import cantor_zassenhaus, split_factors, split_factors_parallel
+from lib.roots import find_roots, linear_factor_product
+from lib.factor import factor
 from lib.test_helper import test_kauma_output, test_kauma_output_raw
 
 from sage.all import *
 
-import unittest, json
+try:
+    from lib import finite_field_batch
+except ImportError:
+    finite_field_batch = None
+
+import unittest, json, random, pickle, copy, time
 
 class TestGCM(unittest.TestCase):
 
@@ -286,3 +297,469 @@ class TestGCM(unittest.TestCase):
             str(zero_pow_sage),
             "SageMath and Python implementation of finite field arithmetic mismatch: power with zero."
         )
+
+    def test_arithmetic_keyed_mul(self):
+        # Initialize SageMath
+        F = GF(2)['a']; (a,) = F._first_ngens(1)
+        K = GF(2**128, name='x', modulus=a**128 + a**7 + a**2 + a + 1 , names=('x',)); (x,) = K._first_ngens(1)
+
+        rand_h = rand_ffpoly(128)
+        h = FFMultiplier(rand_h)
+
+        # Test multiplication with precomputed tables for a fixed operand
+        for rand_a in [rand_ffpoly(128) for _ in range(16)] + [FFPoly(0), FFPoly(1)]:
+            h_times_a = h * rand_a
+            h_times_a_sage = K(str(rand_h)) * K(str(rand_a))
+
+            self.assertEqual(
+                str(h_times_a),
+                str(h_times_a_sage),
+                "SageMath and Python implementation of finite field arithmetic mismatch: keyed multiplication."
+            )
+
+    def test_arithmetic_clmul_backends(self):
+        # Initialize SageMath
+        F = GF(2)['a']; (a,) = F._first_ngens(1)
+        K = GF(2**128, name='x', modulus=a**128 + a**7 + a**2 + a + 1 , names=('x',)); (x,) = K._first_ngens(1)
+
+        operands = [(rand_ffpoly(128), rand_ffpoly(128)) for _ in range(16)]
+        operands += [(rand_ffpoly(64), rand_ffpoly(128)), (rand_ffpoly(128), FFPoly(1)), (rand_ffpoly(128), FFPoly(0))]
+
+        # Test all multiplication backends with cross check against the reference loop
+        try:
+            for name in CLMUL_BACKENDS:
+                set_clmul_backend(name, cross_check=True)
+                for rand_a, rand_b in operands:
+                    a_times_b = rand_a * rand_b
+                    a_times_b_sage = K(str(rand_a)) * K(str(rand_b))
+
+                    self.assertEqual(
+                        str(a_times_b),
+                        str(a_times_b_sage),
+                        f"SageMath and Python implementation of finite field arithmetic mismatch: multiplication ({name})."
+                    )
+        finally:
+            set_clmul_backend(DEFAULT_CLMUL_BACKEND)
+
+    def test_arithmetic_inverse(self):
+        # Initialize SageMath
+        F = GF(2)['a']; (a,) = F._first_ngens(1)
+        K = GF(2**128, name='x', modulus=a**128 + a**7 + a**2 + a + 1 , names=('x',)); (x,) = K._first_ngens(1)
+
+        # Test inversion with extended euclidean algorithm
+        for rand_a in [rand_ffpoly(128) for _ in range(16)] + [rand_ffpoly(8), FFPoly(1)]:
+            if rand_a == 0: continue
+            a_inv = rand_a.inverse
+            a_inv_sage = K(str(FFPoly(1))) / K(str(rand_a))
+
+            self.assertEqual(
+                str(a_inv),
+                str(a_inv_sage),
+                "SageMath and Python implementation of finite field arithmetic mismatch: inverse."
+            )
+
+        # Montgomery batch inversion, zero is mapped to zero
+        elements = [rand_ffpoly(128) for _ in range(16)] + [FFPoly(0), FFPoly(1)]
+        self.assertEqual(
+            ff_batch_inverse([e.poly for e in elements]),
+            [e.inverse.poly for e in elements],
+            "Batch inversion and single inversion mismatch."
+        )
+        rand_a = rand_poly(6)
+        self.assertEqual(rand_a.inverse.coeffs, [c.inverse for c in rand_a.coeffs], "Coefficient-wise inverse mismatch.")
+
+        # Zero has no inverse and is mapped to zero (like a^(2^128 - 2))
+        self.assertEqual(FFPoly(0).inverse, 0, "Inverse of zero should be zero.")
+
+    def test_arithmetic_square(self):
+        # Initialize SageMath
+        F = GF(2)['a']; (a,) = F._first_ngens(1)
+        K = GF(2**128, name='x', modulus=a**128 + a**7 + a**2 + a + 1 , names=('x',)); (x,) = K._first_ngens(1)
+
+        rand_a = rand_ffpoly(128)
+
+        # Test squaring
+        a_square = rand_a.square
+        a_square_sage = K(str(rand_a)) ** 2
+
+        self.assertEqual(
+            str(a_square),
+            str(a_square_sage),
+            "SageMath and Python implementation of finite field arithmetic mismatch: square."
+        )
+
+        # Test Frobenius map a^(2^k) for short (squarings) and long (table) runs
+        for k in [1, 5, 8, 64, 127, 128]:
+            a_frobenius = rand_a.frobenius(k)
+            a_frobenius_sage = K(str(rand_a)) ** (2**k)
+
+            self.assertEqual(
+                str(a_frobenius),
+                str(a_frobenius_sage),
+                f"SageMath and Python implementation of finite field arithmetic mismatch: frobenius (k={k})."
+            )
+
+    def test_block_conversion(self):
+        # Bulk conversion must match the conversion of single blocks
+        data = bytes(random.getrandbits(8) for _ in range(16 * 32))
+        blocks = [data[i:i+16] for i in range(0, len(data), 16)]
+
+        polys = blocks_to_polys(data)
+        self.assertEqual(
+            polys,
+            [FFPoly(block).poly for block in blocks],
+            "Bulk block to polynomial conversion mismatches single block conversion."
+        )
+        self.assertEqual(
+            polys_to_blocks(polys),
+            data,
+            "Bulk polynomial to block conversion mismatches original data."
+        )
+
+        # x^0 is the most significant bit of the first byte
+        self.assertEqual(FFPoly(b"\x80" + b"\x00" * 15).poly, 1, "Block conversion uses wrong bit order.")
+        self.assertEqual(FFPoly(1 << 127).block, b"\x00" * 15 + b"\x01", "Block conversion uses wrong bit order.")
+
+    def test_ffpoly_value_type(self):
+        rand_a = rand_ffpoly(128)
+
+        # Elements are immutable and can be used as dictionary keys
+        self.assertIs(FFPoly(rand_a), rand_a, "FFPoly(FFPoly) should share the immutable instance.")
+        self.assertEqual(hash(FFPoly(rand_a.block)), hash(rand_a), "Equal elements must have the same hash.")
+        self.assertEqual(len({rand_a, FFPoly(rand_a.poly), FFPoly(rand_a.block)}), 1, "Equal elements must be deduplicated.")
+        with self.assertRaises(AttributeError):
+            rand_a.some_attribute = 1
+
+        # 0 and 1 are interned
+        self.assertIs(FFPoly(0), FFPoly(b"\x00" * 16), "Zero should be interned.")
+        self.assertIs(FFPoly(1), rand_a * rand_a.inverse, "One should be interned.")
+
+        # Pickle and deepcopy keep the value and the interned instances
+        self.assertEqual(pickle.loads(pickle.dumps(rand_a)), rand_a, "Pickle round trip mismatch.")
+        self.assertEqual(copy.deepcopy(rand_a), rand_a, "Deepcopy mismatch.")
+        self.assertIs(pickle.loads(pickle.dumps(FFPoly(1))), FFPoly(1), "Unpickled one should be interned.")
+
+    @unittest.skipIf(finite_field_batch is None, "NumPy is not installed")
+    def test_arithmetic_batch(self):
+        elements_a = [rand_ffpoly(128) for _ in range(64)] + [FFPoly(0), FFPoly(1)]
+        elements_b = [rand_ffpoly(128) for _ in range(64)] + [rand_ffpoly(128), rand_ffpoly(128)]
+        batch_a = finite_field_batch.from_ffpolys(elements_a)
+        batch_b = finite_field_batch.from_ffpolys(elements_b)
+
+        expected = {
+            "add": [a + b for a, b in zip(elements_a, elements_b)],
+            "mul": [a * b for a, b in zip(elements_a, elements_b)],
+            "square": [a.square for a in elements_a],
+            "inverse": [a.inverse for a in elements_a],
+            "keyed mul": [a * b for a, b in zip(elements_a, elements_b)],
+            "scalar mul": [elements_a[0] * b for b in elements_b],
+        }
+        results = {
+            "add": finite_field_batch.add(batch_a, batch_b),
+            "mul": finite_field_batch.mul(batch_a, batch_b),
+            "square": finite_field_batch.square(batch_a),
+            "inverse": finite_field_batch.inverse(batch_a),
+            "keyed mul": finite_field_batch.BatchMultiplier(batch_a) * batch_b,
+            "scalar mul": finite_field_batch.BatchMultiplier(elements_a[0]) * batch_b,
+        }
+
+        for name, result in results.items():
+            self.assertEqual(
+                finite_field_batch.to_ffpolys(result),
+                expected[name],
+                f"Batch and single element implementation of finite field arithmetic mismatch: {name}."
+            )
+
+        # Conversion from and to GCM blocks
+        blocks = b"".join([a.block for a in elements_a])
+        self.assertEqual(finite_field_batch.to_ffpolys(finite_field_batch.from_blocks(blocks)), elements_a)
+        self.assertEqual(finite_field_batch.to_blocks(batch_a), blocks)
+
+    def test_arithmetic_accumulator(self):
+        # Initialize SageMath
+        F = GF(2)['a']; (a,) = F._first_ngens(1)
+        K = GF(2**128, name='x', modulus=a**128 + a**7 + a**2 + a + 1 , names=('x',)); (x,) = K._first_ngens(1)
+
+        pairs = [(rand_ffpoly(128), rand_ffpoly(128)) for _ in range(16)]
+        rand_c = rand_ffpoly(128)
+
+        # Test sum of products with lazy reduction
+        accumulator = FFAccumulator()
+        accumulator.add_products(pairs)
+        accumulator.add(rand_c)
+
+        sum_sage = K(str(rand_c))
+        for rand_a, rand_b in pairs:
+            sum_sage += K(str(rand_a)) * K(str(rand_b))
+
+        self.assertEqual(
+            str(accumulator.value),
+            str(sum_sage),
+            "SageMath and Python implementation of finite field arithmetic mismatch: sum of products."
+        )
+
+    def test_poly_mul_karatsuba(self):
+        for degree_a, degree_b in [(40, 40), (63, 17), (100, 3), (0, 50)]:
+            rand_a = rand_poly(degree_a)
+            rand_b = rand_poly(degree_b)
+
+            a_times_b = rand_a * rand_b
+
+            # Compare with the schoolbook multiplication
+            threshold = polynomial.KARATSUBA_THRESHOLD
+            try:
+                polynomial.KARATSUBA_THRESHOLD = degree_a + degree_b + 2
+                a_times_b_schoolbook = rand_a * rand_b
+            finally:
+                polynomial.KARATSUBA_THRESHOLD = threshold
+
+            self.assertEqual(
+                a_times_b,
+                a_times_b_schoolbook,
+                f"Karatsuba and schoolbook polynomial multiplication mismatch (degree {degree_a} * {degree_b})."
+            )
+
+    def test_poly_divmod(self):
+        for degree_a, degree_b in [(40, 7), (20, 20), (3, 9), (12, 0)]:
+            rand_a = rand_poly(degree_a)
+            rand_b = rand_poly(degree_b)
+
+            quotient, remainder = divmod(rand_a, rand_b)
+
+            # a = q * b + r with deg(r) < deg(b)
+            self.assertEqual(quotient * rand_b + remainder, rand_a, f"Division identity does not hold (degree {degree_a} / {degree_b}).")
+            self.assertTrue(remainder.is_zero or remainder.degree < rand_b.degree, "Remainder degree is too large.")
+            self.assertEqual(rand_a / rand_b, quotient, "Quotient of / and divmod differ.")
+            self.assertEqual(rand_a % rand_b, remainder, "Remainder of % and divmod differ.")
+
+    def test_poly_modulus(self):
+        # Check both the long division and the Barrett path
+        threshold = polynomial.BARRETT_THRESHOLD
+        try:
+            for polynomial.BARRETT_THRESHOLD in [threshold, 1]:
+                for degree in [1, 5, 40]:
+                    modulus = rand_poly(degree)
+                    context = PolyModulus(modulus)
+
+                    rand_a = rand_poly(3 * degree)
+                    rand_b = rand_poly(degree - 1)
+
+                    self.assertEqual(context.reduce(rand_a), rand_a % modulus, f"Reduction mismatch (degree {degree}).")
+                    self.assertEqual(context.mul(rand_a, rand_b), (rand_a * rand_b) % modulus, f"Modular multiplication mismatch (degree {degree}).")
+                    self.assertEqual(rand_b.square_and_multiply(5, context), rand_b.square_and_multiply(5, modulus), f"Exponentiation mismatch (degree {degree}).")
+        finally:
+            polynomial.BARRETT_THRESHOLD = threshold
+
+    def test_poly_square(self):
+        for degree in [0, 3, 40]:
+            rand_a = rand_poly(degree)
+            modulus = PolyModulus(rand_poly(7))
+
+            self.assertEqual(rand_a.square, rand_a * rand_a, f"Polynomial squaring mismatch (degree {degree}).")
+            self.assertEqual(modulus.square(rand_a), modulus.mul(rand_a, rand_a), f"Modular squaring mismatch (degree {degree}).")
+
+    def test_poly_pow_window(self):
+        rand_a = rand_poly(4)
+        modulus = PolyModulus(rand_poly(6))
+
+        for exponent in [1, 2, 3, 29, 2**128, (2**128 - 1) // 3]:
+            # Plain square and multiply as reference
+            expected = Poly([1])
+            for bit in format(exponent, "b"):
+                expected = modulus.square(expected)
+                if bit == "1": expected = modulus.mul(expected, rand_a)
+
+            for window in [1, 3, 5]:
+                self.assertEqual(rand_a.square_and_multiply(exponent, modulus, window), expected, f"Modular exponentiation mismatch (exponent {exponent}, window {window}).")
+
+        self.assertEqual(rand_a ** 7, rand_a * rand_a * rand_a * rand_a * rand_a * rand_a * rand_a, "Exponentiation mismatch.")
+
+    def test_poly_pow_repunit(self):
+        rand_a = rand_poly(7)
+        modulus = PolyModulus(rand_poly(8))
+
+        # Frobenius tables against repeated squaring
+        for k in [1, 3, 8, 128]:
+            expected = rand_a
+            for _ in range(k): expected = modulus.square(expected)
+            self.assertEqual(modulus.frobenius(rand_a, k), expected, f"Frobenius mismatch (k {k}).")
+
+        # Repunit exponents (2^(s k) - 1) / (2^s - 1) against plain square and multiply
+        for exponent in [(2**128 - 1) // 3, 2**128 - 1, (2**64 - 1) // 15]:
+            expected = Poly([1])
+            for bit in format(exponent, "b"):
+                expected = modulus.square(expected)
+                if bit == "1": expected = modulus.mul(expected, rand_a)
+            self.assertEqual(modulus.pow(rand_a, exponent), expected, f"Repunit exponentiation mismatch (exponent {exponent}).")
+
+    def test_poly_pow_repunit_threshold(self):
+        # Above the crossover a fresh modulus must not build Frobenius tables
+        # for a single exponentiation, the sliding window is faster
+        exponent = (2**128 - 1) // 3
+        rand_f = rand_poly(3 * polynomial.REPUNIT_THRESHOLD)
+        rand_a = rand_poly(rand_f.degree - 1)
+
+        # Repunit chain with table construction as reference
+        reference = PolyModulus(rand_f)
+        start = time.perf_counter()
+        expected = Poly.from_raw(reference._pow_repunit_raw(reference.reduce(rand_a).raw, 2, 64))
+        reference_time = time.perf_counter() - start
+
+        modulus = PolyModulus(rand_f)
+        start = time.perf_counter()
+        self.assertEqual(modulus.pow(rand_a, exponent), expected, "Exponentiation mismatch above the repunit threshold.")
+        pow_time = time.perf_counter() - start
+        self.assertEqual(modulus._frobenius, {}, "Fresh modulus above the repunit threshold builds Frobenius tables.")
+        self.assertLess(pow_time, reference_time, "Exponentiation with a fresh modulus is slower than building the Frobenius tables.")
+
+        # Existing tables are used
+        self.assertTrue(reference._repunit_tables_built(2, 64), "Frobenius tables are not cached.")
+        self.assertEqual(reference.pow(rand_a, exponent), expected, "Repunit exponentiation with cached tables mismatch.")
+
+    def test_poly_half_gcd(self):
+        common = rand_poly(10)
+        rand_a = rand_poly(50) * common
+        rand_b = rand_poly(45) * common
+        expected = rand_a.gcd(rand_b)
+
+        # Force the half-GCD for small polynomials
+        thresholds = polynomial.HGCD_THRESHOLD, polynomial.HGCD_BASE_SIZE
+        try:
+            polynomial.HGCD_THRESHOLD, polynomial.HGCD_BASE_SIZE = 8, 8
+            self.assertEqual(rand_a.gcd(rand_b), expected, "Half-GCD and Euclid differ.")
+
+            gcd, s, t = rand_a.xgcd(rand_b)
+            self.assertEqual(gcd, expected, "Extended GCD and GCD differ.")
+            self.assertEqual(s * rand_a + t * rand_b, gcd, "Bezout identity does not hold.")
+        finally:
+            polynomial.HGCD_THRESHOLD, polynomial.HGCD_BASE_SIZE = thresholds
+
+        modulus = PolyModulus(rand_poly(12))
+        rand_c = rand_poly(8)
+        self.assertEqual(modulus.mul(modulus.inverse(rand_c), rand_c), Poly([1]), "Inverse in the quotient ring is wrong.")
+
+    def test_poly_evaluate(self):
+        rand_a = rand_poly(200)
+        points = [rand_ffpoly(128) for _ in range(40)] + [FFPoly(0)]
+        expected = []
+        for p in points:
+            value = FFPoly(0)
+            for degree, coeff in enumerate(rand_a.coeffs): value += coeff * p ** degree
+            expected.append(value)
+
+        self.assertEqual([rand_a.evaluate(p) for p in points], expected, "Horner evaluation mismatch.")
+
+        # Horner and batched evaluation
+        threshold = polynomial.BATCH_MIN_LENGTH
+        try:
+            for polynomial.BATCH_MIN_LENGTH in [10**9, 1]:
+                if finite_field_batch is None and polynomial.BATCH_MIN_LENGTH == 1: continue
+                self.assertEqual(rand_a.evaluate_many(points), expected, "Multi-point evaluation mismatch.")
+        finally:
+            polynomial.BATCH_MIN_LENGTH = threshold
+
+        # GHASH is the GHASH polynomial evaluated at H
+        auth_key = rand_ffpoly(128)
+        ghash = GHASH(auth_key.block, random.randbytes(40), random.randbytes(50))
+        self.assertEqual(ghash.poly.evaluate(auth_key), FFPoly(ghash.digest()), "GHASH polynomial mismatch.")
+
+    def test_poly_raw_storage(self):
+        coeffs = [rand_ffpoly(128) for _ in range(5)] + [FFPoly(0)]
+        rand_a = Poly(coeffs)
+
+        # Coefficients are stored as ints, leading zeros are stripped
+        self.assertEqual(rand_a.raw, [c.poly for c in coeffs[:-1]], "Raw coefficients mismatch.")
+        self.assertEqual(rand_a.coeffs, coeffs[:-1], "Coefficients mismatch.")
+        self.assertEqual(rand_a[1], coeffs[1], "Indexing mismatch.")
+        self.assertEqual(rand_a[1:3], coeffs[1:3], "Slicing mismatch.")
+
+        # Copies and results do not share the storage
+        rand_b = rand_a.copy
+        rand_b[0] = FFPoly(1)
+        self.assertEqual(rand_a[0], coeffs[0], "Copy shares coefficients.")
+        self.assertEqual((rand_a + rand_b) - rand_b, rand_a, "Addition mismatch.")
+        self.assertEqual(rand_a ** 1, rand_a, "Exponentiation mismatch.")
+
+        # solve inserts one point per coefficient
+        points = [rand_ffpoly(128) for _ in range(len(rand_a))]
+        expected = FFPoly(0)
+        for degree, coeff in enumerate(rand_a.coeffs): expected += coeff * points[degree] ** degree
+        self.assertEqual(rand_a.solve(points), expected, "Solve mismatch.")
+
+    def test_poly_sparse(self):
+        rand_a = SparsePoly({0: rand_ffpoly(128), 17: rand_ffpoly(128), 60: rand_ffpoly(128)})
+        rand_b = SparsePoly({3: rand_ffpoly(128), 41: rand_ffpoly(128)})
+        rand_c = rand_poly(12)
+
+        # Sparse and dense arithmetic agree
+        self.assertEqual(rand_a.dense.sparse, rand_a, "Sparse conversion mismatch.")
+        self.assertEqual((rand_a * rand_b).dense, rand_a.dense * rand_b.dense, "Sparse multiplication mismatch.")
+        self.assertEqual(rand_a * rand_c, rand_a.dense * rand_c, "Mixed multiplication mismatch.")
+        self.assertEqual((rand_a + rand_b).dense, rand_a.dense + rand_b.dense, "Sparse addition mismatch.")
+        self.assertEqual(rand_a % rand_c, rand_a.dense % rand_c, "Sparse reduction mismatch.")
+        self.assertEqual(SparsePoly({0: 7, 3: 1}) % Poly([5]), Poly([7, 0, 0, 1]) % Poly([5]), "Sparse reduction by a constant mismatch.")
+        self.assertEqual(str(rand_a), str(rand_a.dense), "Sparse string mismatch.")
+
+        # X^(2^128) - X mod f without a dense dividend
+        modulus = PolyModulus(rand_c)
+        x = Poly([0, 1])
+        self.assertEqual(SparsePoly({2**128: 1, 1: 1}) % modulus, modulus.pow(x, 2**128) - x, "Reduction of X^q - X mismatch.")
+
+    def test_poly_roots(self):
+        roots = [rand_ffpoly(128) for _ in range(4)]
+
+        # Roots with a repeated one and a random part without roots
+        rand_a = rand_poly(6) * Poly([roots[0], 1])
+        for root in roots: rand_a = rand_a * Poly([root, 1])
+
+        found = find_roots(rand_a)
+        self.assertTrue(set(roots) <= set(found), "Root finding misses roots.")
+        self.assertTrue(all(rand_a.evaluate(root) == 0 for root in found), "Root finding returns non-roots.")
+
+        product = linear_factor_product(rand_a)
+        self.assertEqual(product.degree, len(found), "Linear factors are not distinct.")
+        self.assertTrue((rand_a % product).is_zero, "Linear factor product does not divide the polynomial.")
+
+    def test_poly_split_factors(self):
+        linear = [Poly([rand_ffpoly(128), 1]) for _ in range(8)]
+        product = Poly([1])
+        for f in linear: product = product * f
+
+        k1, k2 = None, None
+        while k1 is None: k1, k2 = cantor_zassenhaus(product)
+        self.assertEqual(k1 * k2, product, "Cantor-Zassenhaus split mismatch.")
+
+        found, stuck = split_factors(product)
+        self.assertEqual(set(found), set(linear), "Splitting tree mismatch.")
+        self.assertEqual(stuck, [], "Splitting tree gave up.")
+
+        found, stuck = split_factors_parallel(product, 3)
+        self.assertEqual(set(found), set(linear), "Parallel splitting tree mismatch.")
+        self.assertEqual(stuck, [], "Parallel splitting tree gave up.")
+
+        # Hashing follows equality
+        self.assertEqual(hash(linear[0] * linear[1]), hash(linear[1] * linear[0]), "Hash mismatch of equal polynomials.")
+        self.assertEqual(len({linear[0], linear[0].copy}), 1, "Set contains equal polynomials twice.")
+
+    def test_poly_factor(self):
+        # Irreducible quadratics are the monic quadratics without roots
+        quadratics = []
+        while len(quadratics) < 2:
+            quadratic = rand_poly(2)
+            quadratic = quadratic / quadratic[-1]
+            if len(find_roots(quadratic)) == 0: quadratics.append(quadratic)
+        linear = [Poly([rand_ffpoly(128), 1]) for _ in range(3)]
+
+        # Repeated factors, mixed degrees and a non-monic leading coefficient
+        expected = [(linear[0], 3), (linear[1], 1), (linear[2], 2), (quadratics[0], 1), (quadratics[1], 2)]
+        rand_a = Poly([rand_ffpoly(128)])
+        for p, multiplicity in expected:
+            for _ in range(multiplicity): rand_a = rand_a * p
+
+        factors = factor(rand_a)
+        self.assertEqual(
+            sorted((p.raw, e) for p, e in factors),
+            sorted((p.raw, e) for p, e in expected),
+            "Factorisation mismatch."
+        )
+